@@ -22,8 +22,8 @@ and labelling thereof. Components are placed on a grid of nodes 20px spaced.
 Parent Class:
 component | parent class collecting code which initialises each component and various
             oft-used graphical commands. Class methods as follow:
-            __init__        | instantiates an object based on given parameters and builds a few 
-                              dictionaries for positioning/removing labels and arrows.
+            __init__        | instantiates an object based on given parameters and stores the
+                              default arrow position and direction used by change_arrow.
             change_arrow    | updates the text displayed next to an arrow as well as the arrow's
                               direction and visbility based on some logical conditions
             set_vector_type | overrides the vector_type specified by the class in order to draw 
@@ -55,7 +55,10 @@ args: (self,  canvas, value, pos,    vert, label_args,                 arrow_arg
 line(self.canvas1, self.v1.node1(), self.r1.node1())
 
 Usage tips:
-Call draw method after changing any parameter of a component object
+Call draw method after changing any parameter of a component object. Changes made through methods
+  such as change_arrow() are tracked, so circuit.draw(full=False) redraws them; after editing attributes
+  such as label_args or arrow_args directly, also call the component's invalidate() method, or draw
+  with full=True, as they are otherwise not drawn.
 There are several ways to hide labels/arrows: Set label_args[3] or arrow_args[4] (display(bool)) to False
   or set label_args[1]/arrow_args[1] (position(str)) to "none". Text strings can also be set to "". The first
   might best be used with a global "enable arrows" button whereas inidivudal arrows to hide (i.e. zero voltage
@@ -63,14 +66,35 @@ There are several ways to hide labels/arrows: Set label_args[3] or arrow_args[4]
 """
 
 import draw
-from draw import new_arrow
+from draw import new_arrow, colour_dict
 from physics import vector3
-from math import pi
+from math import pi, cos, sin
+
+# Directions and placements as small integers, so that inverting one is a tuple index.
+# label_args and arrow_args still hold the strings; dir_index converts them.
+DIR_LEFT, DIR_RIGHT, DIR_ABOVE, DIR_BELOW, DIR_UP, DIR_DOWN, DIR_NONE = range(7)
+directions = ("left", "right", "above", "below", "up", "down", "none")
+dir_index  = dict((name, i) for i, name in enumerate(directions))
+OPP        = (DIR_RIGHT, DIR_LEFT, DIR_BELOW, DIR_ABOVE, DIR_DOWN, DIR_UP, DIR_NONE)
 
 # Important definition so that directions and placements can easily be inverted
-opp_dict = {"left":"right", "right":"left", "above":"below", "below":"above", "up":"down", "down":"up", "none":"none"}
+opp_dict = dict((name, directions[OPP[i]]) for i, name in enumerate(directions))
+
+# dic_a2 keys (position + direction, e.g. "aboveright") indexed by 7*position + direction,
+# so that finish_draw doesn't build a new key string every time an arrow is drawn
+_a2_keys = tuple(position + direction for position in directions for direction in directions)
+
+# Font used for component labels. Their widths are measured through draw._measure, whose cache
+# is shared with the slider labels.
+_label_font = "14px sans-serif"
 
-class circuit():
+# Numbers already parsed from quantity strings such as "3 V" or "2 mA", see _quantity()
+_quantities = dict() # (parse, text, unit length) : number
+# Quantity strings already formatted by _format_quantity(), and its format strings
+_formatted   = dict() # (number, significant figures, unit) : text
+_fmt_strings = dict() # (significant figures, unit) : format string, e.g. "%.2g V"
+
+class circuit(object):
   """This class stores components, nodes and lines to be drawn in a given circuit."""
   def __init__(self, canvas, components = dict(), nodes = dict(), lines = set()):
     self.canvas = canvas
@@ -78,23 +102,15 @@ class circuit():
     # Initialising containers
     self.components = dict() # of components
     self.nodes = dict()     # of str:list
+    self._pos_to_names = dict() # (x, y) : set of names of the nodes there, for removal by position
     self.lines = set()      # of tuples
+    self._init_rows()
     
     # Adding elements using methods defined below
-    if type(components) == dict and type(nodes) == dict and type(lines) == set:
-      for i in components:
-        # Component type handling in add method
-        self.add(i, components[i]) # Name (str) and component
-      for i in nodes:
-        self.add_node(nodes[i][0], nodes[i][1], i) # x, y, name arguments in this context
-        # when calling manually name can be omitted, but dict entries must have keys
-      for i in lines:
-        self.add_line(i)
-    else:
-      raise TypeError, "Enter components and nodes as dicts; lines as a set."
+    self.extend(components, nodes, lines)
       
-    # Click checking - adds .clicked attribute to components and maintains in a set
-    self.clear_clicks() # Effectively creates the empty set.
+    # Click checking - adds .clicked attribute to components and keeps click state in a column
+    self.clear_clicks() # Effectively unclicks everything.
     self.draw_currents_if_clicked = True # Default behaviour
     
     # Equivalent resistors: data structure
@@ -117,89 +133,261 @@ class circuit():
     if comp_type == None:
       return len(self.components)
     else:
+      # Counts are kept per exact type; summing over subclasses keeps isinstance() semantics
       count = 0
-      for i in self.components.values():
-        if isinstance(i, comp_type):
-          count += 1
+      for i in self._type_counts:
+        if issubclass(i, comp_type):
+          count += self._type_counts[i]
       return count
       
   def size(self):
     """Returns a tuple of greatest x and y positions of circuit. Checks components and nodes."""
-    comp_max = max(i.node2()[0] for i in self.components.values()) # Assumes node2 is always furthest right
-    node_max = max(self.nodes[i][0] for i in self.nodes) # Specified nodes could also be further out than components
-    xmax = max(comp_max, node_max)
-    
-    comp_max = max(i.node2()[1] for i in self.components.values())
-    node_max = max(self.nodes[i][1] for i in self.nodes)
-    ymax = max(comp_max, node_max)
-    return (xmax, ymax)
+    # Node 2 of each component is cached in its row when it is added, and is assumed
+    # to be the furthest point right and down. Specified nodes could also be further out.
+    rows = self._rows.values()
+    xs = [self._node2_x[row] for row in rows] + [node[0] for node in self.nodes.values()]
+    ys = [self._node2_y[row] for row in rows] + [node[1] for node in self.nodes.values()]
+    return (max(xs), max(ys))
   
+  def _init_rows(self):
+    """Creates the empty per-component columns used by the drawing and click methods."""
+    # Components are also stored as parallel lists, one row per component, so that
+    # the passes made every frame walk flat lists instead of each component's attributes.
+    # There is one row per component object, shared by every name it was added under.
+    # Rows are never reused, so a row number stays valid until clear() is called;
+    # a component removed under its last name leaves a None hole in its row.
+    self._rows    = dict() # name (str) : row (int)
+    self._row_of  = dict() # component : row (int)
+    self._refs    = []     # number of names referring to the row's component
+    self._comps   = []     # component objects
+    self._pos_x   = []     # grid position of node 1
+    self._pos_y   = []
+    self._vert    = []
+    self._node2_x = []     # grid position of node 2
+    self._node2_y = []
+    self._clicked = []     # bool click state
+    self._bx0     = []     # pixel bounding box, empty (all 0) if the component has none
+    self._by0     = []
+    self._bx1     = []
+    self._by1     = []
+    self._drawn   = []     # _changes of the component when the circuit last drew it
+    self._clicked_mask = 0 # the same click state as an int, with bit (1 << row) set for clicked rows
+    self._outside_clicks = set() # clicked components that aren't part of the circuit, see toggle_click()
+    self._req_masks = dict() # req : bitmask of the rows of its resistors, see _req_mask()
+    self._type_counts = dict() # component class : number of components of exactly that class
+    self._req_drawn = dict() # req : its _changes when the circuit last drew it
+    self._dirty = True # Whether anything drawn has changed since the last draw(), see draw()
+    self._batch = render_batch() # Reused by draw() every frame
+    
+  def _set_row(self, row, comp):
+    """Copies the position of comp into the given row of the component columns."""
+    self._pos_x[row]   = comp.pos[0]
+    self._pos_y[row]   = comp.pos[1]
+    self._vert[row]    = comp.vert
+    self._node2_x[row], self._node2_y[row] = comp.node2()
+    (self._bx0[row], self._by0[row],
+     self._bx1[row], self._by1[row]) = getattr(comp, "_bbox", (0, 0, 0, 0))
+    
   def clear(self):
     """Resets components, nodes and lines of circuit to empty sets/dicts."""
     self.components = dict()
+    for i in self._comps:
+      if i is not None:
+        i._circuits.remove(self)
+    self._init_rows()
     self.lines = set()
     self.nodes = dict()
+    self._pos_to_names = dict()
     self.clear_clicks()
     self.clear_reqs()
     
   def clear_clicks(self):
     """Reverts all components to unclicked state."""
-    self.clicked = set()
-    for i in self.components.values():
-      i.clicked = False
+    self._clicked = [False]*len(self._comps)
+    self._clicked_mask = 0
+    self._outside_clicks = set()
+    self._dirty = True
+    for i in self._comps:
+      if i is not None:
+        i.clicked = False
       
   def clear_reqs(self):
     """Removes all keys and values in self.reqs dictionary."""
     self.reqs = dict()
+    self._req_masks = dict()
+    self._req_drawn = dict()
+    self._dirty = True
+    
+  @property
+  def clicked(self):
+    """The set of clicked components. Click state itself is kept in the _clicked column,
+    and in _outside_clicks for components toggled while not part of the circuit."""
+    return self._outside_clicks.union(comp for comp, state in zip(self._comps, self._clicked) if state)
     
   
   # Methods for adding to and removing from containers
   # -- For components
   def add(self, name, comp):
     """Adds a component to the circuit."""
+    self._check_component(name, comp)
+    self._add_unchecked(name, comp)
+    
+  def extend(self, components = dict(), nodes = dict(), lines = set()):
+    """Adds a dict of name:component, a dict of name:[x, y] nodes and a set of (x1, y1, x2, y2) lines
+    to the circuit. Everything is checked once up front, so nothing is added if any of it is invalid."""
+    if not (isinstance(components, dict) and isinstance(nodes, dict) and isinstance(lines, set)):
+      raise TypeError("Enter components and nodes as dicts; lines as a set.")
+    for i in components:
+      self._check_component(i, components[i])
+    for i in lines:
+      if not isinstance(i, tuple):
+        raise TypeError("Nodes must be tuples.")
+      if len(i) != 4:
+        raise KeyError("Specify two tuples of length 2 or one tuple of length 4.")
+    
+    for i in components:
+      self._add_unchecked(i, components[i]) # Name (str) and component
+    # Nodes are built into one dict and merged with a single update, rather than an
+    # add_node() call each. Positions are copied into new [x, y] lists, as add_node() does.
+    for i in nodes:
+      self._unindex_node(i)
+    self.nodes.update(dict((i, [nodes[i][0], nodes[i][1]]) for i in nodes))
+    for i in nodes:
+      self._pos_to_names.setdefault((nodes[i][0], nodes[i][1]), set()).add(i)
+    self.lines.update(lines)
+    self._dirty = True
+    
+  def _check_component(self, name, comp):
+    """Raises TypeError unless comp is a component and name a string."""
     if not isinstance(comp, component):
-      raise TypeError, "Object must be of base class component."
-    if type(name) != str:
-      raise TypeError, "Name of component must be a string."
-    else:
-      self.components.update({name:comp})
+      raise TypeError("Object must be of base class component.")
+    if not isinstance(name, str):
+      raise TypeError("Name of component must be a string.")
+    
+  def _add_unchecked(self, name, comp):
+    """Adds a component to the circuit without checking the arguments, see add()."""
+    self.components[name] = comp
+    if name in self._rows:
+      if self._comps[self._rows[name]] is comp: # Adding it again under its name just refreshes its row
+        self._set_row(self._rows[name], comp)
+        self._dirty = True
+        return
+      self._release(name) # Overwriting a name releases the component it referred to
+    row = self._row_of.get(comp)
+    if row is None: # A component new to the circuit gets a new row
+      row = len(self._comps)
+      for column in (self._comps, self._refs, self._pos_x, self._pos_y, self._vert,
+                     self._node2_x, self._node2_y, self._clicked,
+                     self._bx0, self._by0, self._bx1, self._by1, self._drawn):
+        column.append(None)
+      self._comps[row] = comp
+      self._refs[row] = 0
+      self._row_of[comp] = row
+      comp._circuits.append(self) # So that moving it updates the row, see _component_moved()
+      # A component clicked while outside the circuit stays clicked
+      self._clicked[row] = comp in self._outside_clicks
+      if self._clicked[row]:
+        self._outside_clicks.discard(comp)
+        self._clicked_mask |= 1 << row
+    self._refs[row] += 1
+    self._rows[name] = row
+    self._set_row(row, comp)
+    self._type_counts[type(comp)] = self._type_counts.get(type(comp), 0) + 1
+    self._req_masks = dict() # Rows of req resistors may have changed, rebuilt in draw()
+    self._dirty = True
   
   def remove(self, name):
     """Removes a component from the circuit. Does nothing if component isn't in the circuit to begin with."""
-    if type(name) != str:
-      raise TypeError, "Name of component must be string."
+    if not isinstance(name, str):
+      raise TypeError("Name of component must be string.")
     elif name in self.components:
       self.components.pop(name, None)
+      self._release(name)
+      self._dirty = True
+      
+  def _component_moved(self, comp):
+    """Copies the new position of comp into its row. Called by the component when it moves."""
+    self._set_row(self._row_of[comp], comp)
+    self._dirty = True
+    
+  def _release(self, name):
+    """Drops name from the component columns. The row of the component it refers to is emptied
+    once no other name refers to that component."""
+    row = self._rows.pop(name)
+    comp = self._comps[row]
+    self._type_counts[type(comp)] -= 1
+    self._refs[row] -= 1
+    if self._refs[row] == 0:
+      self._row_of.pop(comp, None)
+      comp._circuits.remove(self)
+      self._comps[row] = None
+      if self._clicked[row]: # Stays in the clicked set, as toggle_click() allows outside components
+        self._outside_clicks.add(comp)
+      self._clicked[row] = False
+      self._clicked_mask &= ~(1 << row)
+      self._bx0[row] = self._by0[row] = self._bx1[row] = self._by1[row] = 0 # Can no longer be hit
       
   def add_req(self, req, r_set = set()):
     """Adds an equivalent resistor object to the dictionary self.reqs."""
-    if type(req) != resistor:
-      raise TypeError, "Equivalent resistor must be of resistor class."
-    if type(r_set) != set:
-      raise TypeError, "Resistors must be specified in a set."
+    if not isinstance(req, resistor):
+      raise TypeError("Equivalent resistor must be of resistor class.")
+    if not isinstance(r_set, set):
+      raise TypeError("Resistors must be specified in a set.")
     for i in r_set:
-      if type(i) != resistor:
-        raise TypeError, "All elements of resistor set must be of resistor class."
+      if not isinstance(i, resistor):
+        raise TypeError("All elements of resistor set must be of resistor class.")
     # Will overwrite if there is a conflict.
     self.reqs.update({req:r_set})
+    self._req_masks[req] = self._req_mask(r_set)
+    self._dirty = True
         
   def remove_req(self, req):
     """Removes an equivalent resistor from the dictionary self.reqs."""
-    if type(req) != resistor:
-      raise TypeError, "Equivalent resistor must be of resistor class."
+    if not isinstance(req, resistor):
+      raise TypeError("Equivalent resistor must be of resistor class.")
     # Will not complain if req not in dictionary.
     self.reqs.pop(req, None)
+    self._req_masks.pop(req, None)
+    self._req_drawn.pop(req, None)
+    self._dirty = True
+    
+  def _req_mask(self, r_set):
+    """Returns the click bitmask that matches r_set, or -1 if a resistor in it isn't part of the
+    circuit, as then it can never be clicked and the req never matches."""
+    mask = 0
+    for r in r_set:
+      row = self._row_of.get(r)
+      if row is None:
+        return -1
+      mask |= 1 << row
+    return mask
      
   def toggle_click(self, comp):
-    """Toggles a components membership of the self.clicked set."""
+    """Toggles whether a component is clicked, i.e. its membership of the self.clicked set."""
     if not isinstance(comp, component):
-      raise TypeError, "Object must be of base class component."
-    if comp not in self.clicked: # Must be added
-      comp.clicked = True
-      self.clicked.add(comp)
-    else: # Must be removed
-      comp.clicked = False
-      self.clicked.remove(comp)
+      raise TypeError("Object must be of base class component.")
+    row = self._row_of.get(comp)
+    if row is None: # Not part of the circuit, so it has no row to keep the click in
+      if comp in self._outside_clicks:
+        self._outside_clicks.remove(comp)
+        comp.clicked = False
+      else:
+        self._outside_clicks.add(comp)
+        comp.clicked = True
+    else:
+      self._clicked[row] = comp.clicked = not self._clicked[row]
+      self._clicked_mask ^= 1 << row
+    self._dirty = True
+    
+  def hit_test(self, x, y):
+    """Returns the first component whose circuit symbol contains the pixel position x, y, or None.
+    Only components with a bounding box (currently resistors) can be hit."""
+    # Scans the bounding box columns; empty boxes (other components, removed rows) never match
+    bx0, by0, bx1, by1 = self._bx0, self._by0, self._bx1, self._by1
+    for row in range(len(bx0)):
+      if bx0[row] < x < bx1[row] and by0[row] < y < by1[row]:
+        return self._comps[row]
+    return None
     
   # -- For nodes
   def add_node(self, x, y, name = None):
@@ -207,83 +395,164 @@ class circuit():
     """Adds a node to the circuit from which lines can be drawn. Nodes stored in a set."""
      # Generic incrementing ID chosen for name if unspecified
     name = "node_" + str(len(self.nodes)+1) if name == None else name
+    self._unindex_node(name)
     self.nodes.update({name:[x,y]}) # Overwrites without error if a pre-existing key is used
+    self._pos_to_names.setdefault((x, y), set()).add(name)
+    
+  def _unindex_node(self, name):
+    """Removes the node name from self._pos_to_names, if it is in the circuit."""
+    if name in self.nodes:
+      position = (self.nodes[name][0], self.nodes[name][1])
+      names = self._pos_to_names.get(position, set())
+      names.discard(name)
+      if not names:
+        self._pos_to_names.pop(position, None)
 
   def remove_node(self, argument):
     """Removes a node from the circuit. Can be called by key or value in dict."""
-    if type(argument) == str: # Calling by key
-      for i in self.nodes:
-        if i == argument:
-          self.nodes.pop(i, None)
-    elif type(argument) == list: # Calling by value
-      for i in self.nodes:
-        if self.nodes[i][0] == argument[0] and self.nodes[i][1] == argument[1]:
-          self.nodes.pop(i, None)
+    if isinstance(argument, str): # Calling by key
+      self._unindex_node(argument)
+      self.nodes.pop(argument, None)
+    elif isinstance(argument, list): # Calling by value, removes every node at that position
+      for i in self._pos_to_names.pop((argument[0], argument[1]), ()):
+        self.nodes.pop(i, None)
     else:
-      raise TypeError, "Argument must be node name as string or position of node as tuple."
+      raise TypeError("Argument must be node name as string or position of node as tuple.")
       
   # -- For lines
   def add_line(self, start_node, end_node = tuple()):
     """Adds a line to the circuit."""
-    if type(start_node) == type(end_node) == tuple:
+    if isinstance(start_node, tuple) and isinstance(end_node, tuple):
       if len(start_node) == 4:
+        self._dirty = True
         self.lines.add(start_node) # Specifying all 4 co-ords in first argument
       elif len(start_node) == len(end_node) == 2:
+        self._dirty = True
         self.lines.add(start_node + end_node) # Concatenating tuples
         # In either case the set element will be of the form (x1,y1,x2,y2)
       else:
-        raise KeyError, "Specify two tuples of length 2 or one tuple of length 4."
+        raise KeyError("Specify two tuples of length 2 or one tuple of length 4.")
     else:
-      raise TypeError, "Nodes must be tuples."
+      raise TypeError("Nodes must be tuples.")
       
   def remove_line(self, start_node, end_node = []):
     """Removes a line from the circuit."""
-    if type(start_node) == type(end_node) == list:
+    if isinstance(start_node, list) and isinstance(end_node, list):
       if len(start_node) == 4 and end_node == []:
+        self._dirty = True
         self.lines.discard(start_node) # Removes if present, otherwise does nothing
       elif len(start_node) == len(end_node) == 2:
+        self._dirty = True
         self.lines.discard(start_node + end_node) # List concatenation again
       else:
-        raise KeyError, "Specify two tuples of length 2 or one tuples of length 4."
+        raise KeyError("Specify two tuples of length 2 or one tuples of length 4.")
     else:
-      raise TypeError, "Nodes must be tuples."
+      raise TypeError("Nodes must be tuples.")
     
   
   # Graphical functions  
-  def draw(self):
+  def draw(self, full = True):
+    """Draws the lines, components, currents of clicked components and any matching equivalent resistor.
+    With full=False nothing is drawn if nothing has changed since the last draw, for callers that
+    leave the canvas uncleared between frames; returns whether anything was drawn.
+    Changes made by circuit and component methods are tracked. After editing attributes such as
+    label_args directly, call the component's invalidate() method or draw with full=True."""
+    comps = self._comps
+    if not full and not self._dirty and not self._any_changed():
+      return False
+    # Anything that changed could overlap anything else on the canvas, so all of it is redrawn
+    self._dirty = False
+    
+    # All lines are stroked as one path underneath everything else. Each component is then drawn
+    # whole, symbol and labels, before the next, so that its white fills mask the lines and any
+    # earlier component it overlaps, as they would if drawn one by one
+    batch = self._batch
+    batch.clear()
     for i in self.lines:
-      line(self.canvas, i[0:2], i[2:4])
-      
-    for i in self.components.values():
-      i.draw()
-      if i.clicked and self.draw_currents_if_clicked == True:
+      batch.add_line(i[0], i[1], i[2], i[3])
+    batch.flush(self.canvas)
+    
+    clicked, drawn = self._clicked, self._drawn
+    for row in range(len(comps)):
+      i = comps[row]
+      if i is None: # removed component
+        continue
+      i._add_symbol(batch)
+      batch.flush(self.canvas)
+      i.draw_labels()
+      drawn[row] = i._changes
+      if clicked[row] and self.draw_currents_if_clicked == True:
         i.draw_current() # guesses direction, specify additional arg here if necessary
         
     if self.draw_equivalent_resistor == True:
+      # Components clicked outside the circuit have no bit in the mask, so then the sets are compared
+      clicked_set = self.clicked if self._outside_clicks else None
       for i in self.reqs:
-        if self.reqs[i] == self.clicked: # clickset matches that of req
+        if clicked_set is not None:
+          matched = self.reqs[i] == clicked_set
+        else:
+          if i not in self._req_masks:
+            self._req_masks[i] = self._req_mask(self.reqs[i])
+          matched = self._req_masks[i] == self._clicked_mask
+        if matched: # clicked components match those of req
           i.draw_equivalent()
           if self.draw_currents_if_clicked == True:
             i.draw_current()
-      
+        self._req_drawn[i] = i._changes
+    return True
+    
+  def _any_changed(self):
+    """Returns True if a component or equivalent resistor has changed since this circuit last drew it.
+    Each circuit keeps the change counts it drew, so a component in several circuits is redrawn by each."""
+    drawn = self._drawn
+    for row, i in enumerate(self._comps):
+      if i is not None and i._changes != drawn[row]:
+        return True
+    for i in self.reqs:
+      if i._changes != self._req_drawn.get(i):
+        return True
+    return False
     
     
 
-class component(): # Base class
-  def __init__(self, canvas, value=0, pos=[0,0], vert=0, label_args=["","none","",True], arrow_args=["","none","","",False]):
+class component(object): # Base class
+  # Every attribute has a slot, for faster access and smaller objects. v and i are the voltage and
+  # current labels of a component, new_circuit and to_click are set on equivalent resistors by
+  # create_req. Other attributes can't be set on components.
+  __slots__ = ('canvas', 'value', '_pos', '_vert', '_circuits', 'label_args', 'arrow_args',
+               '_a_position', '_a_direction', '_a_direction_opp',
+               '_l_xy', '_a1_xy', '_dic_l', '_dic_a1', '_dic_a2', 'textspace', 'textspace_a', 'clicked',
+               '_px_x', '_px_y', '_node1_t', '_node2_t', '_px2_x', '_px2_y', '_text_key', '_changes',
+               '_vector_type', '_rects_fill', '_rects_stroke', 'v', 'i', 'new_circuit', 'to_click')
+  _span = 0 # Length in grid squares from node 1 to node 2, set by subclasses
+  _default_vector_type = "" # Arrow colour, set by subclasses and overruled by set_vector_type()
+  _a2_offsets = {} # Arrow positions relative to node 1, set by subclasses, see get_a2()
+  _l_offsets  = () # Label positions relative to node 1, set by subclasses, see _build_dicts()
+  _a1_offsets = () # Arrow label positions likewise
+  def __init__(self, canvas, value=0, pos=(0,0), vert=0, label_args=["","none","",True], arrow_args=["","none","","",False]):
     self.canvas     = canvas
     self.value      = value
-    self.pos        = pos
-    self.vert       = vert
+    self._pos       = tuple(pos) # Copied, so the caller's list can't move the component behind its caches
+    self._vert      = vert
+    self._circuits  = [] # Circuits the component is part of, told when it moves, see _moved()
     self.label_args = label_args
     self.arrow_args = arrow_args
+    self._vector_type = self._default_vector_type # Changed by set_vector_type()
+    # Rectangles of the circuit symbol, set by subclasses that draw them, see _add_symbol()
+    self._rects_fill = self._rects_stroke = ()
+    self._px_x, self._px_y = 20*pos[0], 20*pos[1] # Pixel coordinates of node 1
+    self._cache_nodes()
+    
+    # Default arrow position and direction, and the opposite direction, used by change_arrow()
+    self._a_position      = self.arrow_args[1]
+    self._a_direction     = self.arrow_args[2]
+    self._a_direction_opp = opp_dict[self.arrow_args[2]]
     
-    # Making dictionary mappings for positioning.
-    # True mapped to default case, false mapped to none or opposite.
-    # l refers to labels, a refers to arrows
-    self.l_display_dict    = {True:self.label_args[1], False:"none"}
-    self.a_display_dict    = {True:self.arrow_args[1], False:"none"}
-    self.a_direction_dict  = {True:self.arrow_args[2], False:opp_dict[self.arrow_args[2]]} # specifies default direction
+    # Position and text widths that the label position dictionaries were last built for
+    self._text_key = None
+    # dic_l, dic_a1 and dic_a2 once built or assigned, see their properties
+    self._dic_l = self._dic_a1 = self._dic_a2 = None
+    self._changes = 0 # Counts changes, compared with the count each circuit last drew, see circuit.draw()
   
   def change_arrow(self, text="", condition_display=False, condition_direction=True):
     """Updates the text displayed next to an arrow as well as the arrow's direction and visbility.
@@ -291,79 +560,223 @@ class component(): # Base class
     Otherwise the position will be set to "none" and it will not be displayed.
     If condition direction is True, the default arrow direction is used.
     Otherwise the opposite of this direction is used.
-    These mappings rely on the dictionaries defined earlier.
+    The defaults are the arrow position and direction the component was created with.
     """
     self.arrow_args[0] = text # Set arrow label
-    self.arrow_args[1] = self.a_display_dict[condition_display] # Display in position if true, else hide
-    self.arrow_args[2] = self.a_direction_dict[condition_direction] # Def. direction if true, reverse if false
+    # Display in position if true, else hide
+    self.arrow_args[1] = self._a_position if condition_display else "none"
+    # Def. direction if true, reverse if false
+    self.arrow_args[2] = self._a_direction if condition_direction else self._a_direction_opp
+    self._changes += 1
+    
+  def invalidate(self):
+    """Marks the component as changed, so that circuit.draw(full=False) of every circuit it is in
+    redraws it. Needed after editing attributes such as label_args or value directly."""
+    self._changes += 1
+    
+  def set_pos(self, pos):
+    """Moves the component so that node 1 is at pos. Assigning to self.pos does the same.
+    The position is copied, so editing the list passed in afterwards doesn't move the component."""
+    self._pos = tuple(pos)
+    self._moved()
     
+  def _set_vert(self, vert):
+    """Turns the component, see vert."""
+    self._vert = vert
+    self._moved()
+    
+  # Node 1 position and orientation. Everything cached from them is rebuilt when they are assigned
+  pos  = property(lambda self: self._pos, set_pos)
+  vert = property(lambda self: self._vert, _set_vert)
+    
+  def _moved(self):
+    """Rebuilds the cached pixel positions and geometry after the position or orientation changes,
+    and updates the rows of the circuits the component is part of."""
+    self._px_x, self._px_y = 20*self._pos[0], 20*self._pos[1]
+    self._cache_nodes()
+    self._build_positions() # Symbol geometry; arrows follow _px_x, _px_y through get_a2()
+    self._text_key = None # Label positions are rebuilt on the next draw
+    self._dic_a2 = None # Arrows are placed from the new position, edits to dic_a2 don't carry over
+    self._changes += 1
+    for circ in self._circuits:
+      circ._component_moved(self)
+  
   def set_vector_type(self, new_type):
     """Use this method to overrule the default vector type used in drawing arrows on components
     E.g. to display an arrow of nonstandard colour (but still one defined in colour_dict in new_arrow)
     Updates only arrow colour and not arrow label, which can be changed by other means."""
-    for element in self.dic_a2:
-      self.dic_a2[element][0].vector_type = new_type
+    self._vector_type = new_type # Used for new arrows and label colours
+    if self._dic_a2 is not None: # Arrows already in dic_a2 keep any other edits
+      for element in self._dic_a2:
+        self._dic_a2[element][0].vector_type = new_type
+    self._changes += 1
       
   def set_fill_colour(self, colour = ""):
     """Sets fill colour of self.canvas to specified colour, or vector type colour as default.
     Can be called as simply set_fill_colour() for defaults.
     Colour as 6-digit hex string of form "#aabbcc".    """
-    if colour != "":
-      self.canvas.fill_style = colour
-    else:
-      # Must call new_arrow to access colour_dict
-      # Creates dummy arrow, while preserving line width
-      previous_line_width = self.canvas.line_width
-      vector_type = self.dic_a2.values()[0][0].vector_type # Takes it from first dict entry
-      new_arrow(self.canvas, vector3(1,0,0,vector_type), -1000, -1000)
-      self.canvas.line_width = previous_line_width
+    self.canvas.fill_style = colour or self._default_colour()
+    
+  def _default_colour(self):
+    """Returns the colour new_arrow gives arrows of this component's vector type."""
+    return colour_dict.get(self._vector_type, "#333333")
       
   def node1(self): 
     """Returns position of start node of component. Is equivalent to self.pos."""
     # No need to overwrite in subclasses
-    return tuple(self.pos)
+    return self._node1_t
 
-  def node2(self): # Placeholder
-    # Should be overwritten in subclasses, because each component has a different shape
-    pass
+  def node2(self):
+    """Returns position of end node of component, self._span grid squares on from node 1."""
+    # No need to overwrite in subclasses, they set _span instead
+    return self._node2_t
   
-  def draw(self): # Placeholder
-    # Should be overwritten in subclasses, because each component has a different shape
+  def _cache_nodes(self):
+    """Stores node1() and node2() as tuples, so they aren't rebuilt on every call,
+    and the pixel coordinates of node 2 as _px2_x, _px2_y."""
+    pos = self._pos
+    self._node1_t = pos
+    if self._vert:
+      self._node2_t = (pos[0], pos[1]+self._span)
+    else:
+      self._node2_t = (pos[0]+self._span, pos[1])
+    self._px2_x, self._px2_y = 20*self._node2_t[0], 20*self._node2_t[1]
+  
+  def draw(self):
+    """Draws the circuit symbol, then the labels and arrows. circuit.draw() batches the symbols
+    of all its components instead of calling this."""
+    batch = render_batch()
+    self._add_symbol(batch)
+    batch.flush(self.canvas)
+    self.draw_labels()
+    
+  def draw_labels(self):
+    """Updates label and arrow positions for the measured text, then draws the labels and arrows."""
+    self._update_dicts()
+    # The following graphical commands are common to all components  
+    self.finish_draw()
+    
+  def _update_dicts(self):
+    """Measures the label and arrow text into self.textspace and self.textspace_a, and rebuilds
+    the label positions only when those widths or the position have changed since the last draw."""
+    can = self.canvas
+    x, y = self._px_x, self._px_y
+    can.font = _label_font # Labels are drawn in it; _measure only sets it for uncached text
+    self.textspace   = textspace   = draw._measure(can, self.label_args[0], _label_font)
+    self.textspace_a = textspace_a = draw._measure(can, self.arrow_args[0], _label_font)
+    if (x, y, textspace, textspace_a) != self._text_key:
+      self._build_dicts(x, y, textspace, textspace_a)
+    
+  def _build_dicts(self, x, y, textspace, textspace_a):
+    """Builds the label (_l_xy) and arrow label (_a1_xy) positions for the measured text widths
+    from the class-level _l_offsets and _a1_offsets tables, as tuples indexed by direction."""
+    widths = (0, textspace, textspace/2)
+    self._l_xy  = tuple((x+dx-widths[w], y+dy) for dx, w, dy in self._l_offsets)
+    widths = (0, textspace_a, textspace_a/2)
+    self._a1_xy = tuple((x+dx-widths[w], y+dy) for dx, w, dy in self._a1_offsets)
+    self._text_key = (x, y, textspace, textspace_a)
+    self._dic_l = self._dic_a1 = None # Out of date, rebuilt on next access
+    
+  def _get_dic_l(self):
+    """Returns the label positions as a dict, e.g. "above" : [x, y], see dic_l."""
+    if self._dic_l is None:
+      self._dic_l = dict((directions[i], list(xy)) for i, xy in enumerate(self._l_xy))
+    return self._dic_l
+  
+  def _get_dic_a1(self):
+    """Returns the arrow label positions as a dict, see dic_a1."""
+    if self._dic_a1 is None:
+      self._dic_a1 = dict((directions[i], list(xy)) for i, xy in enumerate(self._a1_xy))
+    return self._dic_a1
+  
+  def _set_dic_l(self, dic):
+    self._dic_l = dic
+    
+  def _set_dic_a1(self, dic):
+    self._dic_a1 = dic
+    
+  # Label and arrow label positions as dicts, built on first access and kept until the text widths
+  # or position change. Labels are drawn from _l_xy and _a1_xy, so as in earlier versions, where
+  # draw() rebuilt these dicts, editing them doesn't move the labels.
+  dic_l  = property(_get_dic_l, _set_dic_l)
+  dic_a1 = property(_get_dic_a1, _set_dic_a1)
+  
+  def _build_positions(self): # Placeholder
+    # Overwritten in subclasses to build geometry from self._px_x and self._px_y
     pass
   
+  def get_a2(self, key):
+    """Returns the new_arrow arguments [vector3, x, y] of the arrow for key, e.g. "aboveright".
+    Taken from dic_a2 once that has been built or assigned, so edits to it are drawn."""
+    if self._dic_a2 is not None:
+      return self._dic_a2[key]
+    dx, dy, vx, vy = self._a2_offsets[key]
+    return [vector3(vx, vy, 0, self._vector_type), self._px_x+dx, self._px_y+dy]
+  
+  def iter_a2(self):
+    """Yields (key, [vector3, x, y]) for every arrow of the component, building each on demand
+    from the class-level _a2_offsets table unless dic_a2 has been built or assigned."""
+    if self._dic_a2 is not None:
+      for item in self._dic_a2.items():
+        yield item
+      return
+    vt, px, py = self._vector_type, self._px_x, self._px_y
+    for key, (dx, dy, vx, vy) in self._a2_offsets.items():
+      yield key, [vector3(vx, vy, 0, vt), px+dx, py+dy]
+  
+  def _a2_dict(self):
+    """Returns the arrows of all keys as a dict, see dic_a2."""
+    if self._dic_a2 is None:
+      self._dic_a2 = dict(self.iter_a2())
+    return self._dic_a2
+  
+  def _set_a2_dict(self, dic):
+    self._dic_a2 = dic
+    self._changes += 1
+  # Arrow dictionary key : [vector3, x, y]. Arrows are built from the _a2_offsets table as they are
+  # drawn until this is first accessed or assigned; from then on the dict is kept and drawn from,
+  # so edits to it show. Moving the component rebuilds it.
+  dic_a2 = property(_a2_dict, _set_a2_dict)
+  
+  def _add_symbol(self, batch):
+    """Adds the circuit symbol to a render_batch. By default this is the rectangles listed by
+    _build_positions(): those in self._rects_fill filled white, those in self._rects_stroke
+    outlined in black. Overwritten in subclasses drawing other shapes."""
+    batch.fill_rects.extend(self._rects_fill)
+    batch.stroke_rects.extend(self._rects_stroke)
+  
   def finish_draw(self):
     """Finishes drawing process by placing arrows and labels after the circuit component is drawn.
     This method is called by the draw methods of component subclasses and is not designed to be
     called by itself.    
     """
     can = self.canvas  # Aliasing for readability
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    
-    can.font         = "14px sans-serif"                    # Setting font
-    self.textspace   = can.measure_text(self.label_args[0]) # Determining size of labels
-    self.textspace_a = can.measure_text(self.arrow_args[0])
+    # Label positions and text widths were brought up to date by _update_dicts() before this call
     
     # Adding labels
     if self.label_args[3] == True and self.label_args[1] != "none":  
       # Star operator expands list into arguments in the function call
-      can.font    = "14px sans-serif" # Setting font
+      # Font was set to _label_font by _update_dicts()
       # Setting label colour, will revert to vector colour if unspecified
-      self.set_fill_colour(self.label_args[2]) 
-      can.fill_text(self.label_args[0], *self.dic_l[self.label_args[1]])
+      can.fill_style = self.label_args[2] or self._default_colour()
+      can.fill_text(self.label_args[0], *self._l_xy[dir_index[self.label_args[1]]])
       
     # Adding arrows
     if self.arrow_args[4] == True:
-      self.set_fill_colour(self.arrow_args[3])  # Updates for text only
-      can.fill_text(self.arrow_args[0], *self.dic_a1[self.a_display_dict[True]]) # draws arrow label
+      can.fill_style = self.arrow_args[3] or self._default_colour()  # Updates for text only
+      can.fill_text(self.arrow_args[0], *self._a1_xy[dir_index[self._a_position]]) # draws arrow label
       if self.arrow_args[2] != "none":
         old_line_width = can.line_width # Preserving line width after possible modification by arrow()
-        new_arrow(can, *(self.dic_a2[self.arrow_args[1] + self.arrow_args[2]]))   # draws arrow based on dictionary lookup
+        key = _a2_keys[7*dir_index[self.arrow_args[1]] + dir_index[self.arrow_args[2]]]
+        new_arrow(can, *(self.get_a2(key)))   # draws arrow based on table lookup
         can.line_width = old_line_width
         
   def draw_current(self, direction = None):
     # Calibrated for resistor display but can be called for any component object
     # Currently only supports left and down arrows
-    olw = self.canvas.line_width
+    can = self.canvas
+    olw = can.line_width
+    can.font = _label_font # Current labels are measured through the same width cache as other labels
     if direction == None: # tries to decide for itself
       if self.vert == 0:
         direction = "left"
@@ -372,467 +785,429 @@ class component(): # Base class
         
     if direction == "left": # Comes left out of resistor node 1
       vect = vector3(-30, 0, 0, "acceleration")
-      new_arrow(self.canvas, vect, 20*self.node1()[0], 20*self.node1()[1])
-      self.canvas.fill_style = "#4c7fbe"
-      mt = self.canvas.measure_text(self.i)
+      new_arrow(can, vect, self._px_x, self._px_y)
+      can.fill_style = "#4c7fbe"
+      mt = draw._measure(can, self.i, _label_font)
       
       # Preventing overlap with label on resistor
       if self.label_args[3] and self.label_args[1] == "above":
-        mt_r = self.canvas.measure_text(self.label_args[0])
+        mt_r = draw._measure(can, self.label_args[0], _label_font)
       elif self.arrow_args[4] and self.arrow_args[1] == "above":
-        mt_r = self.canvas.measure_text(self.arrow_args[0])
+        mt_r = draw._measure(can, self.arrow_args[0], _label_font)
       else:
         mt_r = -1000
-      overlap = mt_r/2 + mt/2 - 43
-      overlap = overlap * (overlap > 0)
       
-      self.canvas.fill_text(self.i, 20*self.node1()[0]-15-mt/2-overlap, 20*self.node1()[1]-20)
+      can.fill_text(self.i, self._px_x-15-mt/2-_current_offset(mt_r, mt), self._px_y-20)
       
     elif direction == "down":
       vect = vector3(0, 30, 0, "acceleration")
-      new_arrow(self.canvas, vect, 20*self.node2()[0], 20*self.node2()[1])
-      self.canvas.fill_style = "#4c7fbe"
-      mt = self.canvas.measure_text(self.i)
-      self.canvas.fill_text(self.i, 20*self.node2()[0]+10, 20*self.node2()[1]+19)
+      new_arrow(can, vect, self._px2_x, self._px2_y)
+      can.fill_style = "#4c7fbe"
+      can.fill_text(self.i, self._px2_x+10, self._px2_y+19)
       
-    self.canvas.line_width = olw  
+    can.line_width = olw  
         
   
     
 class resistor(component):
-  def __init__(self, canvas, value=0, pos=[0,0], vert= 0, label_args=["","none","",True], arrow_args=["","none","","",False]):
+  __slots__ = ('_bbox',)
+  _span = 3 # Length in grid squares from node 1 to node 2
+  _default_vector_type = "resistance" # Colour of arrows, see colour_dict in draw.new_arrow
+  # Arrow positions for get_a2(), key : (dx, dy, vector x, vector y) in pixels from node 1
+  _a2_offsets = {"aboveright":(0, -16, 60, 0), "aboveleft":(60, -16, -60, 0),
+                 "belowright":(0, 16, 60, 0), "belowleft":(60, 16, -60, 0),
+                 "leftup":(-18, 60, 0, -60), "leftdown":(-18, 0, 0, 60),
+                 "rightup":(18, 60, 0, -60), "rightdown":(18, 0, 0, 60)}
+  # Label and arrow label positions for _build_dicts(), indexed by DIR_LEFT, DIR_RIGHT, DIR_ABOVE, DIR_BELOW:
+  #   (dx, width, dy) from node 1, moved left by none (0), all (1) or half (2) of the text width
+  _l_offsets  = ((-16, 1, 35), (16, 0, 35), (30, 2, -16), (30, 2, 26))
+  _a1_offsets = ((-25, 1, 35), (25, 0, 35), (30, 2, -24), (30, 2, 34))
+  def __init__(self, canvas, value=0, pos=(0,0), vert= 0, label_args=["","none","",True], arrow_args=["","none","","",False]):
     # Inheriting generic component initialisation procedure
     component.__init__(self, canvas, value, pos, vert, label_args, arrow_args)
     
     if value < 0: # Resisor-specific code
-      raise "Resistance must be positive."
-    
-    # Arrow positioning dictionary placed here to reduce workload in draw()
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    self.dic_a2 = {"aboveright":[vector3(60,0,0,"resistance"), x, y-16], "aboveleft":[vector3(-60,0,0,"resistance"), x+60, y-16],
-                   "belowright":[vector3(60,0,0,"resistance"), x, y+16], "belowleft":[vector3(-60,0,0,"resistance"), x+60, y+16],
-                   "leftup":[vector3(0,-60,0,"resistance"), x-18, y+60], "leftdown":[ vector3(0,60,0,"resistance"), x-18, y],
-                   "rightup":[vector3(0,-60,0,"resistance"), x+18, y+60],"rightdown":[vector3(0,60,0,"resistance"), x+18, y]}  
-  def node2(self):
+      raise ValueError("Resistance must be positive.")
+    
+    # Geometry depending only on position is built here to reduce workload in draw()
+    self._build_positions()
+  
+  def _build_positions(self):
+    """Builds the bounding box and symbol rectangles for the current pixel position."""
+    x, y = self._px_x, self._px_y
+    
+    # Pixel bounding box (x0, y0, x1, y1) of the circuit symbol, used for click testing
     if self.vert:
-      return (self.pos[0], self.pos[1]+3)
+      self._bbox = (x-10, y, x+10, y+60)
     else:
-      return (self.pos[0]+3, self.pos[1])
+      self._bbox = (x, y-10, x+60, y+10)
     
+    # Rectangles (x, y, w, h) of the circuit symbol, drawn by _add_symbol()
+    if self.vert == False:
+      self._rects_fill   = [(x, y-10, 60, 20)]
+      self._rects_stroke = [(x, y-10, 60, 20)]
+    else:
+      self._rects_fill   = [(x-10, y, 20, 60)]
+      self._rects_stroke = [(x-10, y, 20, 60)]
+  
   def clicked_resistor(self, x, y):
     '''Returns true if x,y coords are within resistor shape, false otherwise.'''
-    if self.vert == False:
-      if 20*self.pos[0] < x < 20*self.pos[0] + 60:
-        if 20*self.pos[1] - 10 < y < 20*self.pos[1] + 10:
-          return True
-    elif self.vert == True:
-      if 20*self.pos[0] - 10 < x < 20*self.pos[0] + 10:
-        if 20*self.pos[1] < y < 20*self.pos[1] + 60:
-          return True
-        
-    return False
+    x0, y0, x1, y1 = self._bbox
+    return x0 < x < x1 and y0 < y < y1
   
   
-  def draw(self):
-    # Aliasing for readability
-    can = self.canvas                           
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    
-    # Determining size of labels
-    textspace   = can.measure_text(self.label_args[0]) 
-    textspace_a = can.measure_text(self.arrow_args[0])
-    
-    ## Drawing circuit symbol
-    can.stroke_style = "#000000" # white fill, black outline
-    can.fill_style   = "#ffffff"
-    if self.vert == False: 
-      can.fill_rect(x, y-10,60,20)
-      can.stroke_rect(x, y-10,60,20)
-    else:
-      can.fill_rect(x-10,y,20,60)
-      can.stroke_rect(x-10,y,20,60)      
-      
-    ## Updating label positions with measured text
-    self.dic_l = {"above":[x-textspace/2+30, y-16], "below":[x-textspace/2+30, y+26], 
-                  "left":[x-textspace-16, y+35],    "right":[x+16, y+35]}
-
-    ## Updating arrow positions with measured text
-    self.dic_a1 = {"above":[x+30-textspace_a/2, y-24], "below":[x+30-textspace_a/2, y+34],
-                   "left":[x-25-textspace_a, y+35], "right":[x+25, y+35]}
-    # self.dic_a2 is defined in __init__ for performance reasons
-      
-    # The following graphical commands are common to all components  
-    self.finish_draw()
-    
   def draw_equivalent(self): # Special commands for when it is an equivalent resistor
     # Aliasing for readability
     can = self.canvas                           
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    
-    # Determining size of labels
-    textspace   = can.measure_text(self.label_args[0]) 
-    textspace_a = can.measure_text(self.arrow_args[0])
-    
-    ## Drawing circuit symbol
-    can.stroke_style = "#000000" # white fill, black outline
-    can.fill_style   = "#ffffff"
-    if self.vert == False: 
-      can.fill_rect(x, y-10,60,20)
-      can.stroke_rect(x, y-10,60,20)
+    x, y = self._px_x, self._px_y
+    
+    ## Drawing circuit symbol, with short leads out of both nodes
+    n1, n2 = self.node1(), self.node2()
+    batch = render_batch()
+    if self.vert == 0:
+      line(can, n1, (n1[0]-2, n1[1]), batch)
+      line(can, n2, (n2[0]+2, n2[1]), batch)
     else:
-      can.fill_rect(x-10,y,20,60)
-      can.stroke_rect(x-10,y,20,60)      
+      line(can, n1, (n1[0], n1[1]-2), batch)
+      line(can, n2, (n2[0], n2[1]+2), batch)
+    self._add_symbol(batch) # white fill, black outline
+    batch.flush(can)
       
-    ## Updating label positions with measured text
-    self.dic_l = {"above":[x-textspace/2+30, y-16], "below":[x-textspace/2+30, y+26], 
-                  "left":[x-textspace-16, y+35],    "right":[x+16, y+35]}
-
-    ## Updating arrow positions with measured text
-    self.dic_a1 = {"above":[x+30-textspace_a/2, y-24], "below":[x+30-textspace_a/2, y+34],
-                   "left":[x-25-textspace_a, y+35], "right":[x+25, y+35]}
-    # self.dic_a2 is defined in __init__ for performance reasons
+    ## Updating label and arrow positions, only when the measured text or position has changed
+    self._update_dicts()
+    # Arrows are placed from the class-level _a2_offsets table, see get_a2()
       
     # Req specific code - adapt for vert
     text = "Equivalent Resistor"
-    mt = can.measure_text(text)
+    mt = draw._measure(can, text, _label_font)
     can.fill_style = "#000000"
     if self.vert == 0:
-      line(can, self.node1(), [self.node1()[0]-2, self.node1()[1]])
-      line(can, self.node2(), [self.node2()[0]+2, self.node2()[1]])
-      can.fill_text(text, 20*self.node1()[0]+30-mt/2, 20*self.node1()[1]+42)
+      can.fill_text(text, x+30-mt/2, y+42)
     else:
-      line(can, self.node1(), [self.node1()[0], self.node1()[1]-2])
-      line(can, self.node2(), [self.node2()[0], self.node2()[1]+2])
-      can.fill_text(text, 20*self.node1()[0]-mt/2, 20*self.node2()[1]+62) 
+      can.fill_text(text, x-mt/2, self._px2_y+62) 
       
     # The following graphical commands are common to all components  
     self.finish_draw()
     
     
 class voltage(component): # Voltage source
-  def __init__(self, canvas, value=0, pos=[0,0], vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
+  __slots__ = ()
+  _span = 1 # Length in grid squares from node 1 to node 2
+  _default_vector_type = "source voltage" # Colour of arrows, see colour_dict in draw.new_arrow
+  # Arrow positions for get_a2(), key : (dx, dy, vector x, vector y) in pixels from node 1
+  _a2_offsets = {"aboveright":(-20, -20, 60, 0), "aboveleft":(40, -20, -60, 0),
+                 "belowright":(-20, 18, 60, 0), "belowleft":(40, 18, -60, 0),
+                 "leftup":(-18, 45, 0, -60), "leftdown":(-18, 0, 0, 60),
+                 "rightup":(18, 45, 0, -60), "rightdown":(18, 0, 0, 60)}
+  # Label and arrow label positions for _build_dicts(), as for resistor
+  _l_offsets  = ((-22, 1, 15), (22, 0, 15), (10, 2, -20), (10, 2, 30))
+  _a1_offsets = ((-25, 1, 15), (25, 0, 15), (10, 2, -26), (10, 2, 34))
+  def __init__(self, canvas, value=0, pos=(0,0), vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
     # Inheriting generic component initialisation procedure
     component.__init__(self, canvas, value, pos, vert, label_args, arrow_args)
     
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    self.dic_a2 = {"aboveright":[vector3(60,0,0,"source voltage"), x-20, y-20], "aboveleft":[vector3(-60,0,0,"source voltage"), x+40, y-20],
-                   "belowright":[vector3(60,0,0,"source voltage"), x-20, y+18], "belowleft":[vector3(-60,0,0,"source voltage"), x+40, y+18],
-                   "leftup":[vector3(0,-60,0,"source voltage"), x-18, y+45], "leftdown":[ vector3(0,60,0,"source voltage"), x-18, y],
-                   "rightup":[vector3(0,-60,0,"source voltage"), x+18, y+45],"rightdown":[vector3(0,60,0,"source voltage"), x+18, y]}
+    # Geometry depending only on position is built here to reduce workload in draw()
+    self._build_positions()
   
-  def node2(self):
-    if self.vert:
-      return (self.pos[0], self.pos[1]+1)
-    else:
-      return (self.pos[0]+1, self.pos[1])
+  def _build_positions(self):
+    """Builds the symbol rectangles for the current pixel position."""
+    x, y = self._px_x, self._px_y
     
-  def draw(self):
-    can = self.canvas
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    textspace   = can.measure_text(self.label_args[0])
-    textspace_a = can.measure_text(self.arrow_args[0])
-    
-    ## Circuit symbol
-    can.stroke_style = "#000000" # black line
+    # Lines of the circuit symbol as zero-width rectangles (x, y, w, h), drawn by _add_symbol()
     if self.vert == True:
-      can.stroke_rect(x-15, y+5,  30, 0) # long line
-      can.stroke_rect(x-7,  y+15, 14, 0) # short line
-      can.stroke_rect(x,  y+15, 0, 5) 
-      can.stroke_rect(x,  y, 0, 5) 
+      self._rects_stroke = [(x-15, y+5, 30, 0),  # long line
+                            (x-7,  y+15, 14, 0), # short line
+                            (x, y+15, 0, 5), (x, y, 0, 5)]
     else:
-      can.stroke_rect(x+5,  y-7, 0, 14)
-      can.stroke_rect(x+15, y-15, 0, 30)
-      can.stroke_rect(x, y, 5, 0)
-      can.stroke_rect(x+15, y, 5, 0)
-    
-    ## Labels
-    self.dic_l = {"above":[x-textspace/2+10, y-20], "below":[x+10-textspace/2, y+30], 
-                    "left":[x-textspace-22, y+15],    "right":[x+22, y+15]}
-    ## Arrow labels
-    self.dic_a1 = {"above":[x-textspace_a/2+10, y-26], "below":[x-textspace_a/2+10, y+34],
-                     "left":[x-25-textspace_a, y+15], "right":[x+25, y+15]}
-      # remember that self.dic_a2 controls arrow placement and is defined in __init__
-      
-    self.finish_draw()
-   
+      self._rects_stroke = [(x+5,  y-7, 0, 14),
+                            (x+15, y-15, 0, 30),
+                            (x, y, 5, 0), (x+15, y, 5, 0)]
+  
 class ac_voltage(component): # Voltage source
-  def __init__(self, canvas, value=0, pos=[0,0], vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
+  __slots__ = ()
+  _span = 2 # Length in grid squares from node 1 to node 2
+  _default_vector_type = "source voltage" # Colour of arrows, see colour_dict in draw.new_arrow
+  # Arrow positions for get_a2(), key : (dx, dy, vector x, vector y) in pixels from node 1
+  _a2_offsets = {"aboveright":(-10, -17, 60, 0), "aboveleft":(50, -17, -60, 0),
+                 "belowright":(-10, 15, 60, 0), "belowleft":(50, 15, -60, 0),
+                 "leftup":(-15, 50, 0, -60), "leftdown":(-15, -10, 0, 60),
+                 "rightup":(15, 50, 0, -60), "rightdown":(15, -10, 0, 60)}
+  # Label and arrow label positions for _build_dicts(), as for resistor
+  _l_offsets  = ((-14, 1, 25), (14, 0, 25), (20, 2, -14), (20, 2, 24))
+  _a1_offsets = ((-25, 1, 25), (25, 0, 25), (20, 2, -26), (20, 2, 34))
+  def __init__(self, canvas, value=0, pos=(0,0), vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
     # Inheriting generic component initialisation procedure
     component.__init__(self, canvas, value, pos, vert, label_args, arrow_args)
-    
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    self.dic_a2 = {"aboveright":[vector3(60,0,0,"source voltage"), x-10, y-17], "aboveleft":[vector3(-60,0,0,"source voltage"), x+50, y-17],
-                   "belowright":[vector3(60,0,0,"source voltage"), x-10, y+15], "belowleft":[vector3(-60,0,0,"source voltage"), x+50, y+15],
-                   "leftup":[vector3(0,-60,0,"source voltage"), x-15, y+50], "leftdown":[ vector3(0,60,0,"source voltage"), x-15, y-10],
-                   "rightup":[vector3(0,-60,0,"source voltage"), x+15, y+50],"rightdown":[vector3(0,60,0,"source voltage"), x+15, y-10]}
-  
-  def node2(self):
-    if self.vert:
-      return (self.pos[0], self.pos[1]+2)
-    else:
-      return (self.pos[0]+2, self.pos[1])
   
-  def draw(self):
-    can = self.canvas
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    textspace   = can.measure_text(self.label_args[0])
-    textspace_a = can.measure_text(self.arrow_args[0])
-    
-    ## Circuit symbol
-    can.stroke_style = "#000000" # black line
-    can.fill_style = "#ffffff"
+  def _add_symbol(self, batch):
+    """Adds the two terminal circles of the circuit symbol to batch."""
+    x, y = self._px_x, self._px_y
     if self.vert == True:
-      can.begin_path()
-      can.arc(x,y+5,5)
-      can.fill()
-      can.stroke()
-      can.begin_path()
-      can.arc(x,y+35,5)
-      can.fill()
-      can.stroke()
+      batch.add_circle(x, y+5, 5)
+      batch.add_circle(x, y+35, 5)
     else:
-      can.begin_path()
-      can.arc(x+5,y,5)
-      can.fill()
-      can.stroke()
-      can.begin_path()
-      can.arc(x+35,y,5)
-      can.fill()
-      can.stroke()
-      
-    ## Labels
-    self.dic_l = {"above":[x-textspace/2+20, y-14], "below":[x-textspace/2+20, y+24], 
-                    "left":[x-textspace-14, y+25],    "right":[x+14, y+25]}
-    ## Arrow labels
-    self.dic_a1 = {"above":[x-textspace_a/2+20, y-26], "below":[x-textspace_a/2+20, y+34],
-                     "left":[x-25-textspace_a, y+25], "right":[x+25, y+25]}
-      # remember that self.dic_a2 controls arrow placement and is defined in __init__
-      
-    self.finish_draw()
-      
-  
+      batch.add_circle(x+5, y, 5)
+      batch.add_circle(x+35, y, 5)
   
 class capacitor(component):
+  __slots__ = ()
   # Arrow placements and geometry reproduce those of the voltage source
-  def __init__(self, canvas, value=0, pos=[0,0], vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
+  _span = 1 # Length in grid squares from node 1 to node 2
+  _default_vector_type = "capacitance" # Colour of arrows, see colour_dict in draw.new_arrow
+  _a2_offsets = voltage._a2_offsets # Arrow positions for get_a2(), as for voltage
+  _l_offsets, _a1_offsets = voltage._l_offsets, voltage._a1_offsets # Label positions, as for voltage
+  def __init__(self, canvas, value=0, pos=(0,0), vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
     # Inheriting generic component initialisation procedure
     component.__init__(self, canvas, value, pos, vert, label_args, arrow_args)
     
     if value < 0:
-      raise "Capacitance can't be negative."
+      raise ValueError("Capacitance can't be negative.")
     
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    
-    self.dic_a2 = {"aboveright":[vector3(60,0,0,"capacitance"), x-20, y-20], "aboveleft":[vector3(-60,0,0,"capacitance"), x+40, y-20],
-                   "belowright":[vector3(60,0,0,"capacitance"), x-20, y+18], "belowleft":[vector3(-60,0,0,"capacitance"), x+40, y+18],
-                   "leftup":[vector3(0,-60,0,"capacitance"), x-18, y+45], "leftdown":[ vector3(0,60,0,"capacitance"), x-18, y],
-                   "rightup":[vector3(0,-60,0,"capacitance"), x+18, y+45],"rightdown":[vector3(0,60,0,"capacitance"), x+18, y]}
-  
-  def node2(self):
-    if self.vert:
-      return (self.pos[0], self.pos[1]+1)
-    else:
-      return (self.pos[0]+1, self.pos[1])
+    # Geometry depending only on position is built here to reduce workload in draw()
+    self._build_positions()
   
-  def draw(self):
-    can = self.canvas
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    textspace   = can.measure_text(self.label_args[0])
-    textspace_a = can.measure_text(self.arrow_args[0])
+  def _build_positions(self):
+    """Builds the symbol rectangles for the current pixel position."""
+    x, y = self._px_x, self._px_y
     
-    ## Circuit symbol
-    can.stroke_style = "#000000" # black line
+    # Plates and leads of the circuit symbol as zero-width rectangles (x, y, w, h), drawn by _add_symbol()
     if self.vert == True:
-      can.stroke_rect(x-15, y+5,  30, 0) # long line
-      can.stroke_rect(x-15,  y+15, 30, 0) # short line
-      can.stroke_rect(x,  y+15, 0, 5) 
-      can.stroke_rect(x,  y, 0, 5) 
+      self._rects_stroke = [(x-15, y+5, 30, 0), (x-15, y+15, 30, 0),
+                            (x, y+15, 0, 5), (x, y, 0, 5)]
     else:
-      can.stroke_rect(x+5,  y-15, 0, 30)
-      can.stroke_rect(x+15, y-15, 0, 30)
-      can.stroke_rect(x, y, 5, 0)
-      can.stroke_rect(x+15, y, 5, 0)
-    
-    ## Labels
-    self.dic_l = {"above":[x-textspace/2+10, y-20], "below":[x+10-textspace/2, y+30], 
-                    "left":[x-textspace-22, y+15],    "right":[x+22, y+15]}
-    ## Arrow labels
-    self.dic_a1 = {"above":[x-textspace_a/2+10, y-26], "below":[x-textspace_a/2+10, y+34],
-                     "left":[x-25-textspace_a, y+15], "right":[x+25, y+15]}
-      
-    self.finish_draw()
-    
+      self._rects_stroke = [(x+5,  y-15, 0, 30), (x+15, y-15, 0, 30),
+                            (x, y, 5, 0), (x+15, y, 5, 0)]
+  
 class inductor(component):
+  __slots__ = ('_arcs',)
+  _span = 3 # Length in grid squares from node 1 to node 2
+  _default_vector_type = "inductance" # Colour of arrows, see colour_dict in draw.new_arrow
   # positioning and geometry copied heavily from resistor class
-  def __init__(self, canvas, value=0, pos=[0,0], vert= 0, label_args=["","none","",True], arrow_args=["","none","","",False]):
+  _a2_offsets = resistor._a2_offsets # Arrow positions for get_a2(), as for resistor
+  _l_offsets, _a1_offsets = resistor._l_offsets, resistor._a1_offsets # Label positions, as for resistor
+  _coil_centres = (10, 30, 50) # Distances of the semicircle centres from node 1 along the symbol
+  def __init__(self, canvas, value=0, pos=(0,0), vert= 0, label_args=["","none","",True], arrow_args=["","none","","",False]):
     component.__init__(self, canvas, value, pos, vert, label_args, arrow_args)
     
     if value < 0:
-      raise "Inductance must be positive."
+      raise ValueError("Inductance must be positive.")
     
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    self.dic_a2 = {"aboveright":[vector3(60,0,0,"inductance"), x, y-16], "aboveleft":[vector3(-60,0,0,"inductance"), x+60, y-16],
-                   "belowright":[vector3(60,0,0,"inductance"), x, y+16], "belowleft":[vector3(-60,0,0,"inductance"), x+60, y+16],
-                   "leftup":[vector3(0,-60,0,"inductance"), x-18, y+60], "leftdown":[ vector3(0,60,0,"inductance"), x-18, y],
-                   "rightup":[vector3(0,-60,0,"inductance"), x+18, y+60],"rightdown":[vector3(0,60,0,"inductance"), x+18, y]}
-  
-  def node2(self):
-    if self.vert:
-      return (self.pos[0], self.pos[1]+3)
-    else:
-      return (self.pos[0]+3, self.pos[1])
+    # Symbol geometry placed here to reduce workload in draw()
+    self._build_positions()
   
-  def draw(self):
-    can = self.canvas                           # Aliasing for readability
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    
-    textspace   = can.measure_text(self.label_args[0]) # Determining size of labels
-    textspace_a = can.measure_text(self.arrow_args[0])
-    
-    ## Drawing circuit symbol
-    can.stroke_style   = "#000000"
+  def _build_positions(self):
+    """Builds the semicircles of the circuit symbol (_arcs) for the current pixel position."""
+    x, y = self._px_x, self._px_y
     if self.vert == False: # horizontal case, default
-      can.begin_path()
-      can.arc(x+10, y+3, 10, pi, 0, False)
-      can.arc(x+30, y+3, 10, pi, 0, False)
-      can.arc(x+50, y+3, 10, pi, 0, False)
-      can.move_to(x, y+5)
-      can.close_path()
-      can.stroke()
+      self._arcs = tuple((x+d, y+3, 10, pi, 0) for d in self._coil_centres)
     else: # vertical case
-      can.begin_path()
-      can.arc(x-3, y+10, 10, -pi/2, pi/2, False)
-      can.arc(x-3, y+30, 10, -pi/2, pi/2, False)
-      can.arc(x-3, y+50, 10, -pi/2, pi/2, False)
-      can.move_to(x-5, y)
-      can.close_path()
-      can.stroke()
-      
-    ## Updating label positions with measured text
-    self.dic_l = {"above":[x-textspace/2+30, y-16], "below":[x-textspace/2+30, y+26], 
-                    "left":[x-textspace-16, y+35],    "right":[x+16, y+35]}
-
-    ## Updating arrow positions with measured text
-    self.dic_a1 = {"above":[x+30-textspace_a/2, y-24], "below":[x+30-textspace_a/2, y+34],
-                     "left":[x-25-textspace_a, y+35], "right":[x+25, y+35]}
-      # recall that self.dic_a2 is defined in __init__
-      
-    self.finish_draw()
+      self._arcs = tuple((x-3, y+d, 10, -pi/2, pi/2) for d in self._coil_centres)
+  
+  def _add_symbol(self, batch):
+    """Adds the three semicircles of the circuit symbol to batch. They join end to end,
+    so they are added as one chain."""
+    batch.add_arcs(self._arcs)
 
 class switch(component):
-  def __init__(self, canvas, value=0, pos=[0,0], vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
+  __slots__ = ('_circles', '_lines')
+  _span = 2 # Length in grid squares from node 1 to node 2
+  _default_vector_type = "source voltage" # Colour of arrows, see colour_dict in draw.new_arrow
+  _a2_offsets = ac_voltage._a2_offsets # Arrow positions for get_a2(), as for ac_voltage
+  _l_offsets, _a1_offsets = ac_voltage._l_offsets, ac_voltage._a1_offsets # Label positions, as for ac_voltage
+  def __init__(self, canvas, value=0, pos=(0,0), vert=1, label_args=["","none","",True], arrow_args=["","none","","",False]):  
     # Inheriting generic component initialisation procedure
     component.__init__(self, canvas, value, pos, vert, label_args, arrow_args)
     
     if self.value not in [0,1]: # 0 being open, 1 being closed
-      raise "Switch's value property should be set to 0 (open) or 1 (closed)."
+      raise ValueError("Switch's value property should be set to 0 (open) or 1 (closed).")
     
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    self.dic_a2 = {"aboveright":[vector3(60,0,0,"source voltage"), x-10, y-17], "aboveleft":[vector3(-60,0,0,"source voltage"), x+50, y-17],
-                   "belowright":[vector3(60,0,0,"source voltage"), x-10, y+15], "belowleft":[vector3(-60,0,0,"source voltage"), x+50, y+15],
-                   "leftup":[vector3(0,-60,0,"source voltage"), x-15, y+50], "leftdown":[ vector3(0,60,0,"source voltage"), x-15, y-10],
-                   "rightup":[vector3(0,-60,0,"source voltage"), x+15, y+50],"rightdown":[vector3(0,60,0,"source voltage"), x+15, y-10]}
-  
-  def node2(self):
-    if self.vert:
-      return (self.pos[0], self.pos[1]+2)
-    else:
-      return (self.pos[0]+2, self.pos[1])
+    # Symbol geometry placed here to reduce workload in draw()
+    self._build_positions()
   
-  def draw(self):
-    can = self.canvas
-    [x, y] = [20*self.pos[0], 20*self.pos[1]]
-    textspace   = can.measure_text(self.label_args[0])
-    textspace_a = can.measure_text(self.arrow_args[0])
-    
-    ## Circuit symbol
-    can.stroke_style = "#000000" # black line
-    can.fill_style = "#ffffff"
+  def _build_positions(self):
+    """Builds the terminal circles (_circles) and the open and closed lines (_lines, indexed by
+    value) of the circuit symbol for the current pixel position."""
+    x, y = self._px_x, self._px_y
     if self.vert == True:
-      can.begin_path()
-      can.arc(x,y+5,5)
-      can.fill()
-      can.stroke()
-      can.begin_path()
-      can.arc(x,y+35,5)
-      can.fill()
-      can.stroke()
-      
-      # Drawing line of switch
-      can.move_to(x,y+30)
-      if self.value == 1: # closed switch
-        can.line_to(x,y+10)
-      elif self.value == 0: # open switch
-        can.line_to(x-9,y+11)
-      can.stroke()
-        
+      self._circles = ((x, y+5, 5), (x, y+35, 5))
+      self._lines   = ((x, y+30, x-9, y+11), (x, y+30, x, y+10)) # open, closed
     else:
-      can.begin_path()
-      can.arc(x+5,y,5)
-      can.fill()
-      can.stroke()
-      can.begin_path()
-      can.arc(x+35,y,5)
-      can.fill()
-      can.stroke()
-      
-      # Drawing line of switch
-      can.move_to(x+10,y)
-      if self.value == 1: # closed switch
-        can.line_to(x+30,y)
-      elif self.value == 0: # open switch
-        can.line_to(x+29,y-9)
-      can.stroke()
+      self._circles = ((x+5, y, 5), (x+35, y, 5))
+      self._lines   = ((x+10, y, x+29, y-9), (x+10, y, x+30, y)) # open, closed
+  
+  def _add_symbol(self, batch):
+    """Adds the two terminal circles and the line of the switch, closed or open, to batch."""
+    for circle in self._circles:
+      batch.add_circle(*circle)
+    if self.value in (0, 1): # value may be toggled between draws
+      batch.add_segment(*self._lines[self.value])
       
-    ## Labels
-    self.dic_l = {"above":[x-textspace/2+20, y-14], "below":[x-textspace/2+20, y+24], 
-                    "left":[x-textspace-14, y+25],    "right":[x+14, y+25]}
-    ## Arrow labels
-    self.dic_a1 = {"above":[x-textspace_a/2+20, y-26], "below":[x-textspace_a/2+20, y+34],
-                     "left":[x-25-textspace_a, y+25], "right":[x+25, y+25]}
-      # remember that self.dic_a2 controls arrow placement and is defined in __init__
       
-    self.finish_draw()
+class render_batch(object):
+  """Collects circuit symbols so that parts sharing a style are drawn together: wires in one
+  black path, then white fills, then black outlines in one path. Fills are only grouped before
+  outlines within what is batched, so circuit.draw() flushes the wires, then each component's
+  symbol on its own, keeping the draw order between components.
+  Components add themselves through their _add_symbol() method; flush() draws and empties the batch.
+  """
+  def __init__(self):
+    self.clear()
+    
+  def clear(self):
+    """Empties the batch."""
+    self.wires        = [] # path ops (method name, args), stroked black before anything else
+    self.fill_rects   = [] # (x, y, w, h) filled white
+    self.fills        = [] # path ops filled white
+    self.stroke_rects = [] # (x, y, w, h) outlined black
+    self.strokes      = [] # path ops stroked black
+    
+  def add_line(self, x1, y1, x2, y2):
+    """Adds a wire between grid points (x1, y1) and (x2, y2), see line():
+    composite lines go vertically first, then horizontally."""
+    self.wires.append(("move_to", (20*x1, 20*y1)))
+    if x1 != x2 and y1 != y2: # Composite line: vertical segment, then horizontal
+      self.wires.append(("line_to", (20*x1, 20*y2)))
+    self.wires.append(("line_to", (20*x2, 20*y2)))
+    
+  def add_segment(self, x1, y1, x2, y2):
+    """Adds a black line between pixel positions (x1, y1) and (x2, y2)."""
+    self.strokes.append(("move_to", (x1, y1)))
+    self.strokes.append(("line_to", (x2, y2)))
+    
+  def add_circle(self, x, y, r):
+    """Adds a white circle with a black outline."""
+    for ops in (self.fills, self.strokes):
+      ops.append(("move_to", (x+r, y))) # Start of the arc, so it isn't joined to the last point
+      ops.append(("arc", (x, y, r, 0, 2*pi, False)))
       
+  def add_arcs(self, arcs):
+    """Adds a chain of black clockwise arcs (x, y, r, start angle, end angle) joined end to end."""
+    x, y, r, start = arcs[0][:4]
+    self.strokes.append(("move_to", (x+r*cos(start), y+r*sin(start))))
+    for arc in arcs:
+      self.strokes.append(("arc", arc + (False,)))
       
+  def flush(self, canvas):
+    """Draws everything in the batch on canvas, then empties it."""
+    # Canvas methods are looked up once per flush rather than once per call, since each lookup
+    #   goes through the canvas component's wrapper in the browser
+    methods = {"move_to": canvas.move_to, "line_to": canvas.line_to, "arc": canvas.arc}
+    if self.wires:
+      canvas.stroke_style = "#000000"
+      self._replay(canvas, methods, self.wires)
+      canvas.stroke()
+    if self.fill_rects or self.fills:
+      canvas.fill_style = "#ffffff"
+      fill_rect = canvas.fill_rect
+      for rect in self.fill_rects:
+        fill_rect(*rect)
+      if self.fills:
+        self._replay(canvas, methods, self.fills)
+        canvas.fill()
+    if self.stroke_rects or self.strokes:
+      canvas.stroke_style = "#000000"
+      stroke_rect = canvas.stroke_rect
+      for rect in self.stroke_rects:
+        stroke_rect(*rect)
+      if self.strokes:
+        self._replay(canvas, methods, self.strokes)
+        canvas.stroke()
+    self.clear()
     
+  def _replay(self, canvas, methods, ops):
+    """Begins a new path on canvas and adds the path ops to it, calling the bound methods given."""
+    canvas.begin_path()
+    for name, args in ops:
+      methods[name](*args)
     
     
-def line(canvas, pos1, pos2):
+def line(canvas, pos1, pos2, batch = None):
   """Draws a line between two nodes on the 20px grid. pos1 and pos2 are lists where
   [0] specifies the x component and [1] specifies the y component. In the case where
   the two points are aligned on either a horizontal or vertical line, this line is drawn.
   Otherwise, the two points are connected via a vertical line and then a horizontal line
-  drawn from the first node, achieved via recursion.
+  drawn from the first node, both segments in the same path.
+  If a render_batch is given, the line is added to it and drawn when it is flushed.
   
   Example usage:
   line(self.canvas1, self.v1.node1(), self.r1.node1()) # top left
   """
+  if batch is not None:
+    batch.add_line(pos1[0], pos1[1], pos2[0], pos2[1])
+    return
   canvas.stroke_style = "#000000" # black line
-  if pos1[0] == pos2[0]: # vertical line
-    canvas.stroke_rect(20*pos1[0],20*pos1[1],0,20*(pos2[1]-pos1[1]))
-  elif pos1[1] == pos2[1]: # horizontal line
-    canvas.stroke_rect(20*pos1[0],20*pos1[1],20*(pos2[0]-pos1[0]),0)
-  else: # Composite line: splits into two segments and recurses. Vertical line drawn first
-    midpos = [pos1[0],pos2[1]]
-    line(canvas,pos1,midpos)
-    line(canvas,midpos,pos2)
+  canvas.begin_path()
+  canvas.move_to(20*pos1[0], 20*pos1[1])
+  if pos1[0] != pos2[0] and pos1[1] != pos2[1]: # Composite line: vertical segment drawn first
+    canvas.line_to(20*pos1[0], 20*pos2[1])
+  canvas.line_to(20*pos2[0], 20*pos2[1])
+  canvas.stroke()
+    
+def _current_offset(mt_r, mt):
+  """Returns how far a current label of width mt must move left to clear a label of width mt_r
+  above a horizontal component, or 0 if they don't overlap."""
+  overlap = mt_r/2 + mt/2 - 43
+  return overlap if overlap > 0 else 0
     
+def _quantity(text, unit_len, parse = float):
+  """Returns the number in a quantity string such as "3 V", dropping the last unit_len characters
+  (the unit and its space) and converting the rest with parse. Each string is only parsed once."""
+  key = (parse, text, unit_len)
+  number = _quantities.get(key)
+  if number is None:
+    number = draw._remember(_quantities, key, parse(text[:-unit_len]))
+  return number
+  
+def _format_quantity(number, sf, unit):
+  """Returns number as text followed by unit (which includes its leading space, e.g. " V"),
+  to sf significant figures, or without trailing zeroes if sf is 0. Results are cached."""
+  key = (number, sf, unit)
+  text = _formatted.get(key)
+  if text is None:
+    if sf == 0: 
+      # Use lazy default mode when trailing zeroes not desired
+      if number == int(number):
+        text = str(int(number)) + unit
+      else:
+        text = str(number) + unit
+    else:
+      fmt = _fmt_strings.get((sf, unit))
+      if fmt is None:
+        fmt = _fmt_strings[(sf, unit)] = "%." + str(int(sf)) + "g" + unit
+      text = fmt % number
+    draw._remember(_formatted, key, text)
+  return text
+  
+try: # Python 2 has a separate long type, Python 3 does not
+  _NUM_TYPES = (int, long, float) # Accepted for create_req's sf argument
+except NameError:
+  _NUM_TYPES = (int, float)
+  
+def _series_r(values):
+  """Returns the resistance of resistors with the given values in series."""
+  return sum(values)
+  
+def _parallel_r(values):
+  """Returns the resistance of resistors with the given values in parallel."""
+  s = 0.0
+  for v in values:
+    s += 1.0/v
+  return 1.0/s
+  
 def create_req(r_set, arranged, new_circuit, to_click, sf = 0):
   """Returns a resistor object equivalent to a set of other resistors arranged in series or parallel."""
-  if type(r_set) != set:
-    raise TypeError, "Resistors must be specified in a set."
-  for i in r_set:
-    if type(i) != resistor:
-      raise TypeError, "Resistor set must contain only resistor objects."
+  if not isinstance(r_set, set):
+    raise TypeError("Resistors must be specified in a set.")
+  if not all(isinstance(i, resistor) for i in r_set):
+    raise TypeError("Resistor set must contain only resistor objects.")
   if arranged not in ("series", "parallel"):
-    raise "Must specify either 'series' or 'parallel' as arranged argument"
-  if type(new_circuit) != circuit:
-    raise TypeError, "new_circuit must be a circuit object."
-  if type(to_click) != str:
-    raise TypeError, "to_click must be a string."
-  if type(sf) not in (int, float, long) or sf < 0:
-    raise TypeError, "Significant figures must be a non-negative number. Floats will be converted to ints."
+    raise ValueError("Must specify either 'series' or 'parallel' as arranged argument")
+  if not isinstance(new_circuit, circuit):
+    raise TypeError("new_circuit must be a circuit object.")
+  if not isinstance(to_click, str):
+    raise TypeError("to_click must be a string.")
+  if not isinstance(sf, _NUM_TYPES) or sf < 0:
+    raise TypeError("Significant figures must be a non-negative number. Floats will be converted to ints.")
   
   # Important note:
   # Since resistor objects are mutable, can't just copy one to another without linking the two.
@@ -841,35 +1216,41 @@ def create_req(r_set, arranged, new_circuit, to_click, sf = 0):
   # The ordering of the list returned by list(r_set) seems to be related to the order
   #   in which the objects are instantiated; and in any case is not guaranteed to be
   #   the order in which they are added to the set.
-  canvas = list(r_set)[0].canvas
-  label_args = []
-  arrow_args = []
-  for i in range(len(list(r_set)[0].label_args)): # Iterating through list of label_args
-    label_args.append(list(r_set)[0].label_args[i])         # Admittedly some of these will be overwritten
-  for i in range(len(list(r_set)[0].arrow_args)):
-    arrow_args.append(list(r_set)[0].arrow_args[i])
+  r_list = list(r_set) # Materialised once, so every use below agrees on which resistor is first
+  first  = r_list[0]
+  canvas = first.canvas
+  # Shallow copies, admittedly some of these will be overwritten. Their elements are strings and
+  #   flags that are only ever replaced, never mutated in place, so nothing deeper is shared.
+  label_args = list(first.label_args)
+  arrow_args = list(first.arrow_args)
+  
+  # Gathering the values of the resistors, and the aggregates of their positions needed below,
+  #   in a single pass
+  values   = []
+  all_vert = True
+  max_x = max_y = None
+  sum_x = sum_y = 0
+  for i in r_list:
+    values.append(i.value)
+    x, y = i.pos[0], i.pos[1]
+    all_vert = all_vert and i.vert == 1
+    if max_x is None or x > max_x:
+      max_x = x
+    if max_y is None or y > max_y:
+      max_y = y
+    sum_x += x
+    sum_y += y
+  n = len(values)
   
   # Calculating resistance
-  r_sum = 0
   if arranged == "series":
-    for i in r_set:
-      r_sum += i.value
-    r = r_sum
+    r = _series_r(values)
   elif arranged == "parallel":
-    for i in r_set:
-      r_sum += float(1)/i.value
-    r = float(1)/r_sum
+    r = _parallel_r(values)
   
   # Preparing text representation to the given s.f.
   # Ends up being of the form u"%.2g Ω" % r
-  if sf == 0: 
-    # Use lazy default mode when trailing zeroes not desired
-    if r == int(r):
-      label_args[0] = str(int(r)) + u" Ω"
-    else:
-      label_args[0] = str(r) + u" Ω"
-  else:  
-    label_args[0] = ("%." + str(int(sf)) + u"g Ω") % r
+  label_args[0] = _format_quantity(r, sf, u" Ω")
   
   arrow_args[4] = True
   
@@ -877,50 +1258,44 @@ def create_req(r_set, arranged, new_circuit, to_click, sf = 0):
   pos = [0,0]
   # First, check whether all in r_set are similarly orientated.
   # Put more brackets here if problems occur
-  if all(i.vert == 1 for i in r_set):
+  if all_vert:
     # All are vertical resistors.
     # Moves rightwards from furthest resistor
-    pos[0] = max(k.pos[0] for k in r_set) + 6
+    pos[0] = max_x + 6
     # Gets average y pos. Recall that non-integer positions are absolutely fine
-    pos[1] = float(sum(k.pos[1] for k in r_set))/len(r_set)
+    pos[1] = float(sum_y)/n
     vert = 1
   else:
     # At least one horizontal resistor
-    pos[0] = float(sum(k.pos[0] for k in r_set))/len(r_set)
-    pos[1] = max(k.pos[1] for k in r_set) + 5
+    pos[0] = float(sum_x)/n
+    pos[1] = max_y + 5
     vert = 0
     
   # Checking potentials and currents.
-  if list(r_set)[0].arrow_args[0][-2:] == " V": # arrows are displaying p.d.
+  if first.arrow_args[0][-2:] == " V": # arrows are displaying p.d.
     # maybe use an all() function here
     if arranged == "series":
-      pd = sum(float(i.arrow_args[0][:-2]) for i in r_set)
-    else:
-      pd = float(list(r_set)[0].arrow_args[0][:-2])
-    if sf == 0:
-      if pd == int(pd):
-        arrow_args[0] = str(int(pd)) + " V"
-      else:
-        arrow_args[0] = str(pd) + " V"
+      pd = sum([_quantity(i.arrow_args[0], 2) for i in r_list])
     else:
-      arrow_args[0] = ("%." + str(int(sf)) + "g V") % pd
+      pd = _quantity(first.arrow_args[0], 2)
+    arrow_args[0] = _format_quantity(pd, sf, " V")
     
     # multiple assignment.
   else:
     # Don't know how to properly format arrow. Hence disable until manually overwritten.
     arrow_args[4] = False 
     
+  # The i attribute is not part of the default resistor object, so missing currents count as 0
   if arranged == "series":
-    # Possibly poor syntax here; not to familiar with try statements
-    try: # Use try because i attribute is not part of default resistor object
-      current = list(r_set)[0].i
-    except:
-      current = 0
+    current = getattr(first, "i", 0)
   elif arranged == "parallel":
-    try:
-      current = str(sum(int(a.i[:-3]) for a in r_set)) + " mA"
-    except:
-      current = 0
+    currents = [getattr(a, "i", None) for a in r_list]
+    current = 0 # Total unknown unless every resistor shows a whole number of mA
+    if all(hasattr(c, "endswith") and c.endswith(" mA") for c in currents):
+      try:
+        current = str(sum([_quantity(c, 3, int) for c in currents])) + " mA"
+      except ValueError: # Not a whole number
+        pass
    
   # Warning: if conditional expressions are specified e.g. in label_args[3] or arrow_args[4] as display
   #  conditions, the expression will be evaluated and then assigned. In essence dynamic behaviour may
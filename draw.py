@@ -30,10 +30,58 @@ paths -- draw dashed lines joining list of points.
 vel_arrows -- draw velocity arrow on ball object.
 cart_arrows -- draw cartesian component arrows of a vector.
 wavelength_to_rgb -- convert wavelength to rgb values.
+wavelengths_to_rgb -- convert a list of wavelengths to rgb values.
 """
 import math
 import physics
 
+_SQRT3 = math.sqrt(3)
+
+# Text font of the sliders and scale bars
+_FONT_SIZE = 14
+_FONT = "{0}px sans-serif".format(_FONT_SIZE)
+
+def _remember(cache, key, value, limit = 500):
+    """Store value in the memo dict cache under key and return it. Memo keys such as labels,
+    values and wavelengths can keep changing, so a cache holding more than limit entries is
+    emptied first rather than left to grow without end. Used by the caches here and in circuits.
+    """
+    if len(cache) > limit:
+        cache.clear()
+    cache[key] = value
+    return value
+
+# Lighter shades of slider colours shown on hover, by base colour, see _hover_colour
+_hover_colours = {}
+
+def _hover_colour(colour):
+    """Return the hex colour string colour with 0x20 added to each channel, capped at 0xff.
+    Each colour is only worked out once, not on every mouse move.
+    """
+    hover = _hover_colours.get(colour)
+    if hover is None:
+        red   = min(int(colour[1:3],16)+0x20, 0xff) # Caps at 0xFF
+        green = min(int(colour[3:5],16)+0x20, 0xff)
+        blue  = min(int(colour[5:7],16)+0x20, 0xff)
+        hover = _remember(_hover_colours, colour, "#{0:02x}{1:02x}{2:02x}".format(red, green, blue))
+    return hover
+
+# Widths of text already measured, by (font, text). Slider labels are redrawn on every
+# mouse event but rarely change, so each one only needs measuring once. circuits measures
+# its component labels through _measure too.
+_text_widths = {}
+
+def _measure(canvas, text, font):
+    """Return the width of text in font. canvas.font is set to font when the text has
+    to be measured, so set it again before drawing in another font.
+    """
+    key = (font, text)
+    width = _text_widths.get(key)
+    if width is None:
+        canvas.font = font
+        width = _remember(_text_widths, key, canvas.measure_text(text))
+    return width
+
 class slider():
     """Anvil Canvas slider object.
     Create a slider between mini and maxi with indicator of given colour which 
@@ -54,11 +102,14 @@ class slider():
     enabled (bool)-- is interaction enabled.
     Methods:
     draw -- draw slider on canvas.
-    map_mouse -- map canvas mouse events to slider object mouse events.
+    map_mouse -- map canvas mouse and reset events to slider object events.
+        The slider takes over the canvas "reset" event, replacing any handler
+        already bound to it.
     mouse_down -- move slider to click position.
     mouse_move -- move slider with mouse if mouse down.
     mouse_up -- stop interaction when mouse up.
     mouse_leave -- stop mouse interaction when mouse leave.
+    canvas_reset -- pick up a new canvas size and redraw.
     """
 
     default_colour = "#318fdb"
@@ -73,7 +124,7 @@ class slider():
         colour (string)-- MUST BE HEX STRING colour of slider.
         """
         if not mini <= start <= maxi:
-            raise "Start value not within range specified."
+            raise ValueError("Start value not within range specified.")
         self.mini = mini
         self.maxi = maxi
         self.stepsize = stepsize
@@ -102,39 +153,49 @@ class slider():
 
         #map canvas mouse events
         self.map_mouse()
+        #static layout, worked out on first draw
+        self._layout_key = None
+        #band of canvas under the grabber and indicator at the last draw, and the
+        #layout it was drawn with. Only redraws for mouse events, see _draw_band,
+        #may repaint just the band; anything else can have painted over the canvas.
+        self._dirty_band = None
+        self._drawn_key = None
+        self._band_only = False
+
         #first draw
         self.draw()
 
-    def draw(self):
-        #First clears the canvas and then draws the slider on it.
-        canvas = self.canvas
-        self.cw = canvas.get_width()
-        self.ch = canvas.get_height()
-        
-        #reset canvas transforms
-        reset2(self.canvas, 1)
-        clear_canvas(canvas, "#fff")
-        
+    def _layout(self, canvas, font, font_size):
+        """Work out the parts of the drawing that don't move with the value: the
+        placement of the line, the padding for the max/min labels and the scale.
+        They are only worked out again when the canvas size or range changes.
+        """
+        key = (self.cw, self.ch, self.mini, self.maxi, self.range, self.maxmin, self.grabber_side)
+        if key == self._layout_key:
+            return
+        self._layout_key = key
+        self._mini_str = "{}".format(repr(self.mini))
+        self._maxi_str = "{}".format(repr(self.maxi))
+
         #vertical placement of slider line, with top padding of 5 pixels.
         self.centre = self.ch - self.grabber_side/2 -5
-        centre = self.centre
-        
-        #slider text font
-        font_size = 14
-        font = "{0}px sans-serif".format(int(font_size))
+
+        #grabber geometry: distance from the line to the centre of its triangle,
+        #and length of the whole grabber (square and triangle) away from the line
+        self._triangle_offset = self.grabber_side*(1+1/_SQRT3)/2
+        self._grabber_length = self.grabber_side*0.5*(1+_SQRT3)
+        #grabber outline, traced at the value each draw
+        self._triangle_pts = _polygon_points(3, self.grabber_side)
+        self._square_pts = _polygon_points(4, self.grabber_side)
 
         #if maximum minimum labels enabled
         if self.maxmin:
-            mini_str = "{}".format(repr(self.mini))
-            maxi_str = "{}".format(repr(self.maxi))
-
             #find text widths
-            mini_size = canvas.measure_text(mini_str)
-            maxi_size = canvas.measure_text(maxi_str)
+            mini_size = _measure(canvas, self._mini_str, font)
+            maxi_size = _measure(canvas, self._maxi_str, font)
             
             #find the bigger text and store it in maxi_size
-            if mini_size > maxi_size:
-                mini_size, maxi_size = maxi_size, mini_size
+            maxi_size = max(mini_size, maxi_size)
                 
             #set horizontal padding to maximum text size + 5
             self.horpad = maxi_size + 5
@@ -142,9 +203,72 @@ class slider():
             #default side padding of 10px
             self.horpad = 10
 
-        horpad = self.horpad
         #rescale with horizontal padding
-        self.scale = (float(self.cw) - 2*horpad)/ self.range
+        self.scale = (float(self.cw) - 2*self.horpad)/ self.range
+
+        #heights of the indicator and max/min labels, and where the labels go
+        self._indicator_y = self.centre - (self._grabber_length + 1.1*font_size)
+        label_y = self.centre - (float(font_size)/2 - 2)
+        self._min_label_pos = (0, label_y)
+        self._max_label_pos = (self.cw - self.horpad + 5, label_y)
+
+    def draw(self):
+        #First clears the canvas and then draws the slider on it.
+        canvas = self.canvas
+        
+        #Pick up any change of canvas size, in case the form has taken over the
+        #"reset" event. Drag frames reuse the size, it can't change mid-drag.
+        if not self.mousedown:
+            self.cw = canvas.get_width()
+            self.ch = canvas.get_height()
+
+        #reset canvas transforms
+        reset2(self.canvas, 1)
+        
+        #slider text font
+        font_size = _FONT_SIZE
+        font = _FONT
+        #set once for all the text below, which draws inside save/restore
+        canvas.font = font
+
+        #placement of the slider line, padding and scale; see _layout
+        self._layout(canvas, font, font_size)
+        centre = self.centre
+        horpad = self.horpad
+        mini_str, maxi_str = self._mini_str, self._maxi_str
+
+        #distance of the grabber along the line, used for it and the indicator
+        along = (self.value - self.mini)*self.scale
+        if self.indicator:
+            value_str = "{0}".format(repr(self.value))
+            #measure text of value to centre it under grabber
+            text_width = _measure(canvas, value_str, font)
+        else:
+            text_width = 0
+
+        #Only the grabber and indicator move between draws of the same layout, so
+        #just the band of canvas they covered last time and cover now is cleared and
+        #repainted, clipped so the rest of the drawing below leaves other pixels alone.
+        #The 10px margin takes in the grabber shadow.
+        half = max(self.grabber_side, text_width/2) + 10
+        band = (along + horpad - half, along + horpad + half)
+        last_band = self._dirty_band
+        clipped = (self._band_only and last_band is not None
+                   and self._drawn_key == (self._layout_key, self.indicator))
+        self._band_only = False
+        self._dirty_band = band
+        self._drawn_key = (self._layout_key, self.indicator)
+        if clipped:
+            left = min(band[0], last_band[0])
+            width = max(band[1], last_band[1]) - left
+            canvas.save()
+            canvas.begin_path()
+            canvas.rect(left, 0, width, self.ch)
+            canvas.clip()
+            canvas.fill_style = "#fff"
+            canvas.fill_rect(left, 0, width, self.ch)
+        else:
+            clear_canvas(canvas, "#fff")
 
         #draw line from left border + horizontal padding to 
         #right border - horizontal padding in vertical centre of canvas.
@@ -158,71 +282,59 @@ class slider():
         canvas.stroke()
 
         #Draw grabber/indexer, composed of an equilateral triangle and a square
-        grabber_side = self.grabber_side
-        
         #find centre of triangle in grabber
-        triangle_centre = centre - grabber_side*(1+1/math.sqrt(3))/2
+        triangle_centre = centre - self._triangle_offset
         #draw triangle at value
-        polygon(canvas, 3, grabber_side, 
-               (self.value - self.mini)*self.scale+ horpad, triangle_centre)
+        _trace_polygon(canvas, self._triangle_pts, along + horpad, triangle_centre)
         canvas.fill_style = self.colour
         canvas.fill()
         
-        #reset transforms
-        reset2(self.canvas, 1)
-        
         #draw square with shadow
-        polygon(canvas, 4, grabber_side, 
-               (self.value - self.mini)*self.scale + horpad, centre)
+        _trace_polygon(canvas, self._square_pts, along + horpad, centre)
         
         #reduce shadow if mouse pressed
         canvas.shadow_blur = 2 if self.mousedown else 5
         canvas.shadow_color = "black"
         canvas.fill_style = self.colour
         canvas.fill()
-        reset2(self.canvas, 1)
 
          #indicator: value under grabber
         if self.indicator:
-            value_str = "{0}".format(repr(self.value))
-
-            canvas.font = font
-            #measure text of value to centre it under grabber
-            text_width = canvas.measure_text(value_str)
-
             canvas.fill_style = "#000"
             canvas.shadow_blur = 0
             
-            #height of grabber to offset
-            height_offset = self.grabber_side*0.5*(1+math.sqrt(3)) + 1.1*font_size
-            canvas.translate((self.value - self.mini)*self.scale - \
-                    text_width/2 + horpad, centre - height_offset)
+            #indicator sits above the grabber, see _layout
+            canvas.save()
+            canvas.translate(along - text_width/2 + horpad, self._indicator_y)
             #Scale canvas as fill_text assumes origin is at top left-hand corner,
             #but reset2 places it at bottom left.
             canvas.scale(1, -1)
             canvas.fill_text(value_str, 0, 0)
-            reset2(canvas, 1)
+            canvas.restore()
 
         #maxmin labels
         if self.maxmin:
-            canvas.font = font
-
             #min
             canvas.fill_style = "#000"
             canvas.shadow_blur = 0
-            height_offset = float(font_size)/2 - 2
-            canvas.translate(0, centre- height_offset)
+            canvas.save()
+            canvas.translate(*self._min_label_pos)
             #Scale canvas as fill_text assumes origin is at top left-hand corner,
             #but reset2 places it at bottom left.
             canvas.scale(1, -1)
             canvas.fill_text(mini_str, 0, 0)
-            reset2(canvas, 1)
+            canvas.restore()
 
             #max
-            canvas.translate(self.cw - horpad + 5, centre - height_offset)
+            canvas.save()
+            canvas.translate(*self._max_label_pos)
             canvas.scale(1, -1)
             canvas.fill_text(maxi_str, 0, 0)
-            reset2(canvas, 1)
+            canvas.restore()
+
+        #drop the clip to the dirty band
+        if clipped:
+            canvas.restore()
 
     #Map mouse events onto the slider in the canvas.
     def map_mouse(self):
@@ -231,12 +343,18 @@ class slider():
         canvas.set_event_handler("mouse_leave", self.mouse_leave)
         canvas.set_event_handler("mouse_down", self.mouse_down)
         canvas.set_event_handler("mouse_move", self.mouse_move)
+        #the canvas is cleared when it is reset, e.g. resized, so the slider owns
+        #this event; a form needing it too should call canvas_reset from its handler
+        canvas.set_event_handler("reset", self.canvas_reset)
     
     #mouse is clicked
     def mouse_down(self, x, y, button, **event_args):
         # x (int) - horizontal position of mouse
         # y (int) - vertical position of mouse
         # button (button) - clicked button
+        #a drag starts here, so take the current canvas size, see draw
+        self.cw = self.canvas.get_width()
+        self.ch = self.canvas.get_height()
     
         if self.enabled and self.horpad < x < self.cw - self.horpad + 5:#Modified 25/02/16 - NHB. 
                  #If 5 is added, the second if statement was not needed. 
@@ -246,7 +364,7 @@ class slider():
             self.value = int(((x -self.horpad)/self.scale + self.mini)/self.stepsize) * self.stepsize
             #else: #Removed 25/02/16 - NHB
                  # self.value = int(1+((x -self.horpad)/self.scale + self.mini)/self.stepsize)*self.stepsize
-            self.draw()
+            self._draw_band()
 
     #mosue is moved
     def mouse_move(self, x, y, **event_args):
@@ -260,20 +378,23 @@ class slider():
             xcheck = abs((x-self.horpad) - (self.value-self.mini)*self.scale) <= self.grabber_side
             ycheck = abs(self.centre - y) <= self.grabber_side
             if xcheck and ycheck:
-                #self.colour = "#{0:x}".format(int(self.base_colour[1:], 16) + 0x202020)
-                red   = hex(min(int(self.base_colour[1:3],16)+0x20, 0xff)) # Caps at 0xFF
-                green = hex(min(int(self.base_colour[3:5],16)+0x20, 0xff))
-                blue  = hex(min(int(self.base_colour[5:7],16)+0x20, 0xff))
-                self.colour = "#" + str(red)[-2:] + str(green)[-2:] + str(blue)[-2:]
+                colour = _hover_colour(self.base_colour)
             else:
-                self.colour = self.base_colour
+                colour = self.base_colour
 
+            value = self.value
             if self.mousedown and self.horpad < x <self.cw - self.horpad + 5: #modified 16/03/16 NHB c.f.above
                 #if x < self.cw/2:
-                self.value = int(((x -self.horpad)/self.scale + self.mini)/self.stepsize)*self.stepsize
+                value = int(((x -self.horpad)/self.scale + self.mini)/self.stepsize)*self.stepsize
                 #else:
                     #self.value = int(1+((x -self.horpad)/self.scale + self.mini)/self.stepsize)*self.stepsize
-            self.draw()
+
+            #most mouse moves don't change the step or the hover state, so nothing to redraw
+            if value == self.value and colour == self.colour:
+                return
+            self.colour = colour
+            self.value = value
+            self._draw_band()
 
     #mouse is unclicked
     def mouse_up(self, x, y, button, **event_args):
@@ -282,7 +403,7 @@ class slider():
         # button (button) - clicked button
         
         self.mousedown = False
-        self.draw()
+        self._draw_band()
 
     #mouse left canvas
     def mouse_leave(self, x, y,**event_args):
@@ -290,6 +411,23 @@ class slider():
         # y (int) - vertical position of mouse
     
         self.mousedown = False
+        self._draw_band()
+
+    #canvas reset, e.g. resized
+    def canvas_reset(self, **event_args):
+        #Store the new canvas size, lay out again and redraw, as the canvas is
+        #cleared. The size is stored in case a drag is in progress, see draw.
+        self.cw = self.canvas.get_width()
+        self.ch = self.canvas.get_height()
+        self._layout_key = None
+        #the canvas has been cleared, so nothing from the last draw can be kept
+        self._dirty_band = self._drawn_key = None
+        self.draw()
+
+    def _draw_band(self):
+        #Redraw after a mouse event on the slider. Only the grabber and indicator
+        #can have moved since the last draw, so draw() may repaint just their band.
+        self._band_only = True
         self.draw()
 
 class vert_slider():
@@ -312,11 +450,14 @@ class vert_slider():
     enabled (bool)-- is interaction enabled.
     Methods:
     draw -- draw slider on canvas.
-    map_mouse -- map canvas mouse events to slider object mouse events.
+    map_mouse -- map canvas mouse and reset events to slider object events.
+        The slider takes over the canvas "reset" event, replacing any handler
+        already bound to it.
     mouse_down -- move slider to click position.
     mouse_move -- move slider with mouse if mouse down.
     mouse_up -- stop interaction when mouse up.
     mouse_leave -- stop mouse interaction when mouse leave.
+    canvas_reset -- pick up a new canvas size and redraw.
     """
 
     default_colour = "#318fdb"
@@ -331,7 +472,7 @@ class vert_slider():
         colour (string)-- MUST BE HEX STRING colour of slider.
         """
         if not mini <= start <= maxi:
-            raise "Start value not within range specified."
+            raise ValueError("Start value not within range specified.")
         self.mini = mini
         self.maxi = maxi
         self.stepsize = stepsize
@@ -360,39 +501,40 @@ class vert_slider():
 
         #map canvas mouse events
         self.map_mouse()
+        #static layout, worked out on first draw
+        self._layout_key = None
+
         #first draw
         self.draw()
 
-    def draw(self):
-        #First clears the canvas and then draws the slider on it.
-        canvas = self.canvas
-        self.cw = canvas.get_width()
-        self.ch = canvas.get_height()
-        
-        #reset canvas transforms
-        reset2(self.canvas, 1)
-        clear_canvas(canvas, "#fff")
-        
+    def _layout(self, canvas, font, font_size):
+        """Work out the parts of the drawing that don't move with the value: the
+        placement of the line, the padding for the max/min labels and the scale.
+        They are only worked out again when the canvas size or range changes.
+        """
+        key = (self.cw, self.ch, self.mini, self.maxi, self.range, self.maxmin, self.grabber_side)
+        if key == self._layout_key:
+            return
+        self._layout_key = key
+        self._mini_str = "{}".format(repr(self.mini))
+        self._maxi_str = "{}".format(repr(self.maxi))
+
         #horizontal placement of slider line, with side padding of 10 pixels.
         self.centre = self.cw - self.grabber_side/2 -10
-        centre = self.centre
-        
-        #slider text font
-        font_size = 14
-        font = "{0}px sans-serif".format(int(font_size))
+
+        #length of the whole grabber (square and triangle) away from the line
+        self._grabber_length = self.grabber_side*0.5*(1+_SQRT3)
+        #grabber outline, traced at the value each draw
+        self._square_pts = _polygon_points(4, self.grabber_side)
 
         #if maximum minimum labels enabled
         if self.maxmin:
-            mini_str = "{}".format(repr(self.mini))
-            maxi_str = "{}".format(repr(self.maxi))
-
             #find text widths
-            mini_size = canvas.measure_text(mini_str)
-            maxi_size = canvas.measure_text(maxi_str)
+            mini_size = _measure(canvas, self._mini_str, font)
+            maxi_size = _measure(canvas, self._maxi_str, font)
             
             #find the bigger text and store it in maxi_size
-            if mini_size > maxi_size:
-                mini_size, maxi_size = maxi_size, mini_size
+            maxi_size = max(mini_size, maxi_size)
                 
             #set vertical padding to maximum text size + 5
             self.vertpad = font_size + 5
@@ -400,9 +542,34 @@ class vert_slider():
             #default top padding of 10px
             self.vertpad = 10
 
-        vertpad = self.vertpad
         #rescale with vertical padding
-        self.scale = (float(self.ch) - 2*vertpad)/ self.range
+        self.scale = (float(self.ch) - 2*self.vertpad)/ self.range
+
+    def draw(self):
+        #First clears the canvas and then draws the slider on it.
+        canvas = self.canvas
+
+        #Pick up any change of canvas size, in case the form has taken over the
+        #"reset" event. Drag frames reuse the size, it can't change mid-drag.
+        if not self.mousedown:
+            self.cw = canvas.get_width()
+            self.ch = canvas.get_height()
+        
+        #reset canvas transforms
+        reset2(self.canvas, 1)
+        clear_canvas(canvas, "#fff")
+        
+        #slider text font
+        font_size = _FONT_SIZE
+        font = _FONT
+        #set once for all the text below, which draws inside save/restore
+        canvas.font = font
+
+        #placement of the slider line, padding and scale; see _layout
+        self._layout(canvas, font, font_size)
+        centre = self.centre
+        vertpad = self.vertpad
+        mini_str, maxi_str = self._mini_str, self._maxi_str
 
         #draw line from bottom border + vertical padding to 
         #top border - vertical padding in vertical centre of canvas.
@@ -417,6 +584,8 @@ class vert_slider():
 
         #Draw grabber/indexer, composed of an equilateral triangle and a square
         grabber_side = self.grabber_side
+        #distance of the grabber along the line, used for it and the indicator
+        along = (self.value - self.mini)*self.scale
         
         #find centre of triangle in grabber
         #triangle_centre = centre - grabber_side*(1+1/math.sqrt(3))/2
@@ -427,61 +596,55 @@ class vert_slider():
         #canvas.fill_style = self.colour
         #canvas.fill()
         
-        #reset transforms
-        reset2(self.canvas, 1)
-        
         #draw square with shadow
-        polygon(canvas, 4, grabber_side, 
-                centre, (self.value - self.mini)*self.scale + vertpad)
+        _trace_polygon(canvas, self._square_pts, centre, along + vertpad)
         
         #reduce shadow if mouse pressed
         canvas.shadow_blur = 2 if self.mousedown else 5
         canvas.shadow_color = "black"
         canvas.fill_style = self.colour
         canvas.fill()
-        reset2(self.canvas, 1)
 
          #indicator: value under grabber
         if self.indicator:
             value_str = "{0}".format(repr(self.value))
 
-            canvas.font = font
             #measure text of value to centre it by grabber
-            text_width = canvas.measure_text(value_str)
+            text_width = _measure(canvas, value_str, font)
 
             canvas.fill_style = "#000"
             canvas.shadow_blur = 0
             
             #width of grabber to offset
-            width_offset = self.grabber_side*0.5*(1+math.sqrt(3)) + text_width + 5
-            canvas.translate(centre - width_offset, (self.value - self.mini)*self.scale - \
-                    text_width/2 + vertpad)
+            width_offset = self._grabber_length + text_width + 5
+            canvas.save()
+            canvas.translate(centre - width_offset, along - text_width/2 + vertpad)
             #Scale canvas as fill_text assumes origin is at top left-hand corner,
             #but reset2 places it at bottom left.
             canvas.scale(1, -1)
             canvas.fill_text(value_str, 0, 0)
-            reset2(canvas, 1)
+            canvas.restore()
 
         #maxmin labels
         if self.maxmin:
-            canvas.font = font
-
             #min
             canvas.fill_style = "#000"
             canvas.shadow_blur = 0
             width_offset = float(text_width)/2 - 2
+            canvas.save()
             canvas.translate(centre- width_offset, 0)
             #Scale canvas as fill_text assumes origin is at top left-hand corner,
             #but reset2 places it at bottom left.
             canvas.scale(1, -1)
             canvas.fill_text(mini_str, 0, 0)
-            reset2(canvas, 1)
+            canvas.restore()
 
             #max
+            canvas.save()
             canvas.translate(centre - width_offset, self.ch - vertpad + 5)
             canvas.scale(1, -1)
             canvas.fill_text(maxi_str, 0, 0)
-            reset2(canvas, 1)
+            canvas.restore()
 
     #Map mouse events onto the slider in the canvas.
     def map_mouse(self):
@@ -490,12 +653,18 @@ class vert_slider():
         canvas.set_event_handler("mouse_leave", self.mouse_leave)
         canvas.set_event_handler("mouse_down", self.mouse_down)
         canvas.set_event_handler("mouse_move", self.mouse_move)
+        #the canvas is cleared when it is reset, e.g. resized, so the slider owns
+        #this event; a form needing it too should call canvas_reset from its handler
+        canvas.set_event_handler("reset", self.canvas_reset)
     
     #mouse is clicked
     def mouse_down(self, x, y, button, **event_args):
         # x (int) - horizontal position of mouse
         # y (int) - vertical position of mouse
         # button (button) - clicked button
+        #a drag starts here, so take the current canvas size, see draw
+        self.cw = self.canvas.get_width()
+        self.ch = self.canvas.get_height()
         y = self.ch - y
     
         if self.enabled and self.vertpad < y < self.ch - self.vertpad + 5:#Modified 25/02/16 - NHB. 
@@ -521,19 +690,22 @@ class vert_slider():
             ycheck = abs((y-self.vertpad) - (self.value-self.mini)*self.scale) <= self.grabber_side
             xcheck = abs(self.centre - x) <= self.grabber_side
             if xcheck and ycheck:
-                #self.colour = "#{0:x}".format(int(self.base_colour[1:], 16) + 0x202020)
-                red   = hex(min(int(self.base_colour[1:3],16)+0x20, 0xff)) # Caps at 0xFF
-                green = hex(min(int(self.base_colour[3:5],16)+0x20, 0xff))
-                blue  = hex(min(int(self.base_colour[5:7],16)+0x20, 0xff))
-                self.colour = "#" + str(red)[-2:] + str(green)[-2:] + str(blue)[-2:]
+                colour = _hover_colour(self.base_colour)
             else:
-                self.colour = self.base_colour
+                colour = self.base_colour
 
+            value = self.value
             if self.mousedown and self.vertpad < y <self.ch - self.vertpad + 5: #modified 16/03/16 NHB c.f.above
                 #if x < self.cw/2:
-                self.value = int(((y -self.vertpad)/self.scale + self.mini)/self.stepsize)*self.stepsize
+                value = int(((y -self.vertpad)/self.scale + self.mini)/self.stepsize)*self.stepsize
                 #else:
                     #self.value = int(1+((x -self.horpad)/self.scale + self.mini)/self.stepsize)*self.stepsize
+
+            #most mouse moves don't change the step or the hover state, so nothing to redraw
+            if value == self.value and colour == self.colour:
+                return
+            self.colour = colour
+            self.value = value
             self.draw()
             
 
@@ -554,7 +726,16 @@ class vert_slider():
     
         self.mousedown = False
         self.draw()
-        
+
+    #canvas reset, e.g. resized
+    def canvas_reset(self, **event_args):
+        #Store the new canvas size, lay out again and redraw, as the canvas is
+        #cleared. The size is stored in case a drag is in progress, see draw.
+        self.cw = self.canvas.get_width()
+        self.ch = self.canvas.get_height()
+        self._layout_key = None
+        self.draw()
+
 class log_scale_bar_vert():
     """Anvil Canvas slider object.
     Create a logarithmic scale bar between mini and maxi with indicator of given colour which 
@@ -580,6 +761,8 @@ class log_scale_bar_vert():
     mouse_move -- move slider with mouse if mouse down.
     mouse_up -- stop interaction when mouse up.
     mouse_leave -- stop mouse interaction when mouse leave.
+    canvas_reset -- pick up a new canvas size and redraw, for a "reset"
+        handler of the host form to call.
     """
 
     default_colour = "#509e2e"
@@ -624,39 +807,35 @@ class log_scale_bar_vert():
 
         #map canvas mouse events
         
+        #static layout, worked out on first draw
+        self._layout_key = None
+
         #first draw
         self.draw()
 
-    def draw(self):
-        #First clears the canvas and then draws the slider on it.
-        canvas = self.canvas
-        self.cw = canvas.get_width()
-        self.ch = canvas.get_height()
-        
-        #reset canvas transforms
-        reset2(self.canvas, 1)
-        clear_canvas(canvas, "#fff")
-        
+    def _layout(self, canvas, font, font_size):
+        """Work out the parts of the drawing that don't move with the value: the
+        placement of the line, the padding for the max/min labels and the scale.
+        They are only worked out again when the canvas size or range changes.
+        """
+        key = (self.cw, self.ch, self.mini, self.maxi, self.range, self.maxmin)
+        if key == self._layout_key:
+            return
+        self._layout_key = key
+        self._mini_str = "{}".format(repr(self.mini))
+        self._maxi_str = "{}".format(repr(self.maxi))
+
         #horizontal placement of center line, with side padding of 5 pixels.
         self.centre = self.cw/2 -5
-        centre = self.centre
-        
-        #slider text font
-        font_size = 14
-        font = "{0}px sans-serif".format(int(font_size))
 
         #if maximum minimum labels enabled
         if self.maxmin:
-            mini_str = "{}".format(repr(self.mini))
-            maxi_str = "{}".format(repr(self.maxi))
-
             #find text widths
-            mini_size = canvas.measure_text(mini_str)
-            maxi_size = canvas.measure_text(maxi_str)
+            mini_size = _measure(canvas, self._mini_str, font)
+            maxi_size = _measure(canvas, self._maxi_str, font)
             
             #find the bigger text and store it in maxi_size
-            if mini_size > maxi_size:
-                mini_size, maxi_size = maxi_size, mini_size
+            maxi_size = max(mini_size, maxi_size)
                 
             #set vertical padding to maximum text size + 5
             self.vertpad = maxi_size + 5
@@ -664,9 +843,43 @@ class log_scale_bar_vert():
             #default top padding of 10px
             self.vertpad = 10
 
-        vertpad = self.vertpad
         #rescale with vertical padding
-        self.scale = (float(self.ch) - 2*vertpad)/ self.range
+        self.scale = (float(self.ch) - 2*self.vertpad)/ self.range
+
+        #max/min labels and the labels between them, one per order of magnitude,
+        #as (text, x, y). They are drawn with y flipped back for the text, so the
+        #heights are stored negated.
+        text_height = 1.1 * font_size
+        label_x = self.centre + (float(font_size)/2 - 2)
+        self._labels = [(self._mini_str, label_x, -(self.vertpad - text_height/2)),
+                        (self._maxi_str, label_x, -(self.ch - self.vertpad + 5 - text_height/2))]
+        for i in range(1,int(self.range)):
+            self._labels.append(("{0}".format(self.mini * (10**i)), label_x,
+                                 -(self.vertpad + (i*self.scale) - text_height/2)))
+
+    def draw(self):
+        #First clears the canvas and then draws the slider on it.
+        canvas = self.canvas
+
+        #Only drawn on demand, so the canvas size is read each time rather than
+        #relying on a "reset" handler, which the form may need for itself
+        self.cw = canvas.get_width()
+        self.ch = canvas.get_height()
+        
+        #reset canvas transforms
+        reset2(self.canvas, 1)
+        clear_canvas(canvas, "#fff")
+        
+        #slider text font
+        font_size = _FONT_SIZE
+        font = _FONT
+        #set once for all the text below, which draws inside save/restore
+        canvas.font = font
+
+        #placement of the slider line, padding and scale; see _layout
+        self._layout(canvas, font, font_size)
+        centre = self.centre
+        vertpad = self.vertpad
 
         #draw line from top border + vert padding to 
         #bottom border - vert padding in vertical centre of canvas.
@@ -675,27 +888,24 @@ class log_scale_bar_vert():
         canvas.line_width = 4
         canvas.line_cap = "round"
         canvas.line_to(centre, self.ch-vertpad)
-        canvas.shadow_blur = 0
-        canvas.stroke_style = "#333333" #line colour isaac dark grey
-        canvas.stroke()
-        
-        canvas.begin_path()
+        #tick at the minimum, stroked with the line
         canvas.move_to(centre-5, vertpad)
         canvas.line_to(centre+5, vertpad)
+        canvas.shadow_blur = 0
+        canvas.stroke_style = "#333333" #line colour isaac dark grey
         canvas.stroke()
         
 
         
         #indicator: value of bar
         if self.value > self.mini and self.value < self.maxi:
-          
-        
-          
+            #height of the bar above the minimum, used for it and the indicator
+            along = math.log10(self.value/self.mini)*self.scale
+
             value_str = "%.3g" %(self.value)
 
-            canvas.font = font
             #measure text of value to centre it under grabber
-            text_width = canvas.measure_text(value_str)
+            text_width = _measure(canvas, value_str, font)
             text_height = 1.1 * font_size
 
             canvas.fill_style = "#000"
@@ -703,21 +913,21 @@ class log_scale_bar_vert():
             
             #width of font to offset
             width_offset =  text_width + (float(font_size)/2 - 2)
-            canvas.translate(centre - width_offset, (math.log10(self.value/self.mini))*self.scale - \
-                    text_height/2 + vertpad)
+            canvas.save()
+            canvas.translate(centre - width_offset, along - text_height/2 + vertpad)
             #Scale canvas as fill_text assumes origin is at top left-hand corner,
             #but reset2 places it at bottom left.
             canvas.scale(1, -1)
             canvas.fill_style = self.colour
             canvas.fill_text(value_str, 0, 0)
-            reset2(canvas, 1)
+            canvas.restore()
             
             #draw bar
             width_offset = float(font_size)/2 - 2
             canvas.begin_path()
             canvas.move_to(centre-width_offset,vertpad)
-            canvas.line_to(centre-width_offset,vertpad + (math.log10(self.value/self.mini))*self.scale)
-            canvas.line_to(centre+width_offset,vertpad + (math.log10(self.value/self.mini))*self.scale)
+            canvas.line_to(centre-width_offset,vertpad + along)
+            canvas.line_to(centre+width_offset,vertpad + along)
             canvas.line_to(centre+width_offset,vertpad)
             canvas.close_path()
             canvas.fill_style = self.colour
@@ -726,32 +936,22 @@ class log_scale_bar_vert():
 
         #maxmin labels
         if self.maxmin:
-            canvas.font = font
-
-            #min
             canvas.fill_style = "#000"
             canvas.shadow_blur = 0
-            width_offset = float(font_size)/2 - 2
-            text_height = 1.1 * font_size
-            canvas.translate(centre+ width_offset, vertpad - text_height/2)
+            canvas.save()
             #Scale canvas as fill_text assumes origin is at top left-hand corner,
-            #but reset2 places it at bottom left.
-            canvas.scale(1, -1)
-            canvas.fill_text(mini_str, 0, 0)
-            reset2(canvas, 1)
-
-            #max
-            canvas.translate(centre + width_offset, self.ch - vertpad + 5 - text_height/2)
+            #but reset2 places it at bottom left. One flip serves every label.
             canvas.scale(1, -1)
-            canvas.fill_text(maxi_str, 0,0)
-            reset2(canvas, 1)
-            
-            for i in range(1,int(self.range)):
-              canvas.translate(centre+ width_offset, vertpad + (i*self.scale) - text_height/2)
-              canvas.scale(1, -1)
-              add_str = "{0}".format(self.mini * (10**i))
-              canvas.fill_text(add_str, 0,0)
-              reset2(canvas, 1)    
+            fill_text = canvas.fill_text
+            for text, x, y in self._labels:
+                fill_text(text, x, y)
+            canvas.restore()
+
+    #canvas reset, e.g. resized
+    def canvas_reset(self, **event_args):
+        #Lay out again and redraw, as the canvas is cleared.
+        self._layout_key = None
+        self.draw()
 
               
 def reset2(canvas, xu):
@@ -793,6 +993,52 @@ def circle(canvas, radius, x = 0, y = 0):
     canvas.close_path()
     
 
+# Colours of arrows drawn by new_arrow, by vector_type. Other modules may look
+# colours up here directly rather than drawing an arrow to set them.
+colour_dict = {"displacement":"#000000", 
+               "force":       "#bb2828",
+               "force2":      "#fea100",
+               "velocity":    "#49902a",
+               "acceleration":"#4c7fbe",
+               "light_grey":  "#CCCCCC",
+               "dark_grey":   "#666666",
+               "yellow":      "#fea100",
+               "electric_2":  "#3d6da9", # Only Lorentz force app seems to use this
+                           
+               "resistance":    "#bb2828",
+               "inductance":    "#fea100",
+               "capacitance":   "#666666",
+               "impedance":     "#944cbe",
+               "source voltage":"#000000",
+               "current":       "#4c7fbe"}
+
+# Arrowhead edges are at 0.5236 radians to the arrow, see _arrow_head
+_HEAD_COS = math.cos(0.5236)
+_HEAD_SIN = math.sin(0.5236)
+
+def _mag_dir(vector):
+    """Return the magnitude of vector with the cosine and sine of its angle in the
+    x-y plane, i.e. vector.mag() and the direction of vector.phi(), in one go.
+    """
+    x, y, z = vector.x, vector.y, vector.z
+    xy_squared = x**2 + y**2
+    xy_length = math.sqrt(xy_squared)
+    mag = math.sqrt(xy_squared + z**2) if z else xy_length
+    if xy_length == 0:
+        return mag, 1.0, 0.0
+    return mag, x/xy_length, y/xy_length
+
+def _arrow_head(vector, tip_length, cos_phi, sin_phi):
+    """Return the two back corners of the head of an arrow along vector, relative
+    to its start, whose edges are tip_length long at 0.5236 radians to the arrow.
+    cos_phi and sin_phi give the direction of vector, see _mag_dir.
+    """
+    # cos and sin of phi -/+ 0.5236 from the angle sum identities, so no trig
+    c = tip_length*_HEAD_COS
+    s = tip_length*_HEAD_SIN
+    return ((vector.x - (c*cos_phi + s*sin_phi), vector.y - (c*sin_phi - s*cos_phi)),
+            (vector.x - (c*cos_phi - s*sin_phi), vector.y - (c*sin_phi + s*cos_phi)))
+
 def new_arrow(canvas, vector, x = 0, y = 0, style = "default"):
     """Draws an arrow starting at x and y along the vector3 object vector. Draws
     it in the appropriate isaac colours based on the vector.vector_type attribute.
@@ -808,37 +1054,19 @@ def new_arrow(canvas, vector, x = 0, y = 0, style = "default"):
     # canvas is the canvas to draw on
     # vector is a vector3 object
     # x and y are the co-ordinates of the start of the arrow
-    if vector.mag() == 0:
+    arrow_length, cos_phi, sin_phi = _mag_dir(vector)
+    if arrow_length == 0:
         return 0
    
-	# Work out colour of arrow from vector type
-    colour_dict = {"displacement":"#000000", 
-                   "force":       "#bb2828",
-                   "force2":      "#fea100",
-                   "velocity":    "#49902a",
-                   "acceleration":"#4c7fbe",
-                   "light_grey":  "#CCCCCC",
-                   "dark_grey":   "#666666",
-                   "yellow":      "#fea100",
-                   "electric_2":  "#3d6da9", # Only Lorentz force app seems to use this
-                               
-                   "resistance":    "#bb2828",
-                   "inductance":    "#fea100",
-                   "capacitance":   "#666666",
-                   "impedance":     "#944cbe",
-                   "source voltage":"#000000",
-                   "current":       "#4c7fbe"}
-    
-    arrow_colour = colour_dict[vector.vector_type] if vector.vector_type in colour_dict else "#333333"
+	# Work out colour of arrow from vector type, see colour_dict above
+    arrow_colour = colour_dict.get(vector.vector_type, "#333333")
     canvas.stroke_style = canvas.fill_style = arrow_colour
     
     if style == "default" or style == "dashed":
         # The tip length of the arrow is 1/10 of the length of the arrow
-        arrow_length = vector.mag()
         arrow_tip_length = max(0.1 * arrow_length, 5) # At least 5
        
-        if arrow_length < 3:
-            arrow_width = arrow_length
+        # Width grows with length in two linear stretches, capped at 7.5
         if arrow_length < 100:
             arrow_width = 3 + 0.02 * arrow_length
         elif arrow_length < 600:
@@ -846,12 +1074,10 @@ def new_arrow(canvas, vector, x = 0, y = 0, style = "default"):
         else:
             arrow_width = 7.5
         canvas.line_width = arrow_width
-    
-        # Work out the angle of the vector to the horizontal
-        drawing_arrow_direction = vector.phi()
         
   	    # Move to corner
-        canvas.translate(x,y)
+        if x or y: # no need to move for arrows drawn from the origin
+            canvas.translate(x,y)
         canvas.begin_path()
         canvas.move_to(0,0)
    	
@@ -865,28 +1091,30 @@ def new_arrow(canvas, vector, x = 0, y = 0, style = "default"):
         canvas.stroke()
   	 
   	    # Draw arrowhead. The edges are at 0.5236 radians to the direction of the arrow
-        canvas.begin_path()
-        canvas.move_to(vector.x,vector.y)
-        canvas.line_to(vector.x-arrow_tip_length*math.cos(drawing_arrow_direction-0.5236),vector.y-arrow_tip_length*math.sin(drawing_arrow_direction-0.5236))
-        canvas.line_to(vector.x-arrow_tip_length*math.cos(drawing_arrow_direction+0.5236),vector.y-arrow_tip_length*math.sin(drawing_arrow_direction+0.5236))
-        canvas.close_path()
-        canvas.stroke()
-        canvas.fill()
-        canvas.translate(-x,-y) # Resetting translated canvas position
+        # A head as long as the whole arrow (at most 5px) would just cover the
+        # shaft, so very short arrows are drawn as a line only
+        if arrow_length > arrow_tip_length:
+            (x1, y1), (x2, y2) = _arrow_head(vector, arrow_tip_length, cos_phi, sin_phi)
+            canvas.begin_path()
+            canvas.move_to(vector.x,vector.y)
+            canvas.line_to(x1, y1)
+            canvas.line_to(x2, y2)
+            canvas.close_path()
+            canvas.stroke()
+            canvas.fill()
+        if x or y:
+            canvas.translate(-x,-y) # Resetting translated canvas position
         
     elif style == "skeletal": # For drawing axes
         # Inspired by Konrad's draw_arrow (grapher module)
-        arrow_length = vector.mag()
         arrow_tip_length = 10
         arrow_width = 1
         canvas.line_width = arrow_width
     
         # Following code is identical to default behaviour
-        # Work out the angle of the vector to the horizontal
-        drawing_arrow_direction = vector.phi()
-        
         # Move to corner
-        canvas.translate(x,y)
+        if x or y: # no need to move for arrows drawn from the origin
+            canvas.translate(x,y)
         canvas.begin_path()
         canvas.move_to(0,0)
    	
@@ -896,20 +1124,27 @@ def new_arrow(canvas, vector, x = 0, y = 0, style = "default"):
         canvas.stroke()
         
         # Draw arrowhead. The edges are at 0.5236 radians to the direction of the arrow
+        (x1, y1), (x2, y2) = _arrow_head(vector, arrow_tip_length, cos_phi, sin_phi)
         canvas.begin_path()
         canvas.move_to(vector.x,vector.y)
-        canvas.line_to(vector.x-arrow_tip_length*math.cos(drawing_arrow_direction-0.5236),vector.y-arrow_tip_length*math.sin(drawing_arrow_direction-0.5236))
+        canvas.line_to(x1, y1)
         canvas.close_path()
         canvas.stroke()
         
         canvas.begin_path()
         canvas.move_to(vector.x,vector.y)
-        canvas.line_to(vector.x-arrow_tip_length*math.cos(drawing_arrow_direction+0.5236),vector.y-arrow_tip_length*math.sin(drawing_arrow_direction+0.5236))
+        canvas.line_to(x2, y2)
         canvas.close_path()
         canvas.stroke()
-        canvas.translate(-x,-y) # Resetting translated canvas position
+        if x or y:
+            canvas.translate(-x,-y) # Resetting translated canvas position
         
         
+# Outline of arrow() after its base corner, as fractions of its length and width:
+# horizontal line, up on arrow head, to tip, back, finish head, back to base
+_arrow_outline = ((0.8, 0.0), (0.8, 0.75), (1.0, -0.5), (0.8, -1.75), (0.8, -1.0),
+                  (0.0, -1.0))
+
 def arrow(canvas, length, width, x= 0, y= 0):
     """Draw horizontal arrow of length and width starting at middle of base at x,y."""
     #Redundant, but needs to be roemoved from existing simulations
@@ -917,18 +1152,10 @@ def arrow(canvas, length, width, x= 0, y= 0):
     canvas.translate(x,y+ width/2)
     canvas.begin_path()
     canvas.move_to(0,0)
-    #horizontal line
-    canvas.line_to(0.8*length, 0)
-    #up on arrow head
-    canvas.line_to(0.8*length, 1.5*width/2)
-    #to tip
-    canvas.line_to(length, -width/2)
-    #back
-    canvas.line_to(0.8*length, -3.5*width/2)
-    #finish head
-    canvas.line_to(0.8*length, -width)
-    #back to base
-    canvas.line_to(0, -width)
+    #outline from _arrow_outline, scaled by length along and width across
+    line_to = canvas.line_to
+    for along, across in _arrow_outline:
+        line_to(along*length, across*width)
     canvas.close_path()
     #negate translation
     canvas.translate(-x,-y-width/2)
@@ -944,31 +1171,48 @@ def polygon(canvas, sides, length, x = 0, y = 0, phi = 0):
     #length (float) - lenght of sides
     #x (int) - horizontal position
     #y (int) - veritcal position
-    canvas.translate(x,y)
-    N = sides
-    l = length
+    #corners are worked out here rather than by rotating the canvas for each one
+    _trace_polygon(canvas, _polygon_points(sides, length, phi), x, y)
+
+# Corners of regular polygons already worked out, by (sides, length, phi). The same
+# shape is usually drawn again and again, only moved.
+_polygon_corners = {}
+
+def _polygon_points(sides, length, phi = 0):
+    """Vertices of the regular polygon polygon() draws, relative to its centre,
+    so a shape that only ever moves can be traced without rotating the canvas.
+    """
+    key = (sides, length, phi)
+    points = _polygon_corners.get(key)
+    if points is not None:
+        return points
     
     #central angle
-    a = 2*math.pi/N
-    
+    a = 2*math.pi/sides
+    cos_a, sin_a = math.cos(a), math.sin(a)
     #distance from centre to middle of one side
-    d = float(l)*math.sqrt((1+math.cos(a))/(1-math.cos(a)))/2
-     #Rotates canvas by alpha before drawing. All subsequent points are 
-    #rotated by phi too.
-    canvas.rotate(phi)
-    #Starts the polygon to the left of the centre and down
+    d = float(length)*math.sqrt((1+cos_a)/(1-cos_a))/2
+    #first corner is to the left of the centre and down, rotated by phi
+    px, py = -length/2, d
+    if phi:
+        cos_p, sin_p = math.cos(phi), math.sin(phi)
+        px, py = px*cos_p - py*sin_p, px*sin_p + py*cos_p
+    points = [(px, py)]
+    #each following corner is the last one rotated by the central angle
+    for i in range(sides - 1):
+        px, py = px*cos_a - py*sin_a, px*sin_a + py*cos_a
+        points.append((px, py))
+    return _remember(_polygon_corners, key, tuple(points))
+
+def _trace_polygon(canvas, points, x = 0, y = 0):
+    """Start a closed path through points (from _polygon_points) centred at x, y."""
     canvas.begin_path()
-    canvas.move_to(-l/2, d)
-    
-    #Rotate each subsequent line_to by the central angle.
-    for i in range(N):
-        canvas.rotate(a)
-        canvas.line_to(-l/2, d)
+    px, py = points[0]
+    canvas.move_to(x + px, y + py)
+    line_to = canvas.line_to
+    for px, py in points[1:]:
+        line_to(x + px, y + py)
     canvas.close_path()
-    
-    #Remove rotation and translation
-    canvas.rotate(-phi)
-    canvas.translate(-x,-y)
 
 def dashed_line(canvas, dashlength, x2, y2, x = 0, y = 0, colour = "black"):
     """Draw dashed line from x, y to x2, y2, each segment of length dashlength.
@@ -984,7 +1228,7 @@ def dashed_line(canvas, dashlength, x2, y2, x = 0, y = 0, colour = "black"):
     #colour (string) - colour of dashed lines. Default is black
     
     #total length of line
-    length = math.sqrt((x2-x)**2 + (y2-y)**2)
+    length = math.hypot(x2-x, y2-y)
     
     #number of dashes.
     no = int(length/dashlength)
@@ -995,14 +1239,21 @@ def dashed_line(canvas, dashlength, x2, y2, x = 0, y = 0, colour = "black"):
         dy = float(y2-y)/no
         #fraction of segment to draw (dash size)
         factor = 0.8
+        dash_x = factor*dx
+        dash_y = factor*dy
         
         canvas.stroke_style = colour
         canvas.begin_path()
-        canvas.move_to(x,y)
 
+        #step along the line from the start of one segment to the next, each dash
+        #its own move_to/line_to pair, with no stray move after the last one
+        seg_x, seg_y = x, y
+        move_to, line_to = canvas.move_to, canvas.line_to
         for i in range(no):
-            canvas.line_to(x+(i+factor)*dx, y+(i+factor)*dy)
-            canvas.move_to(x + (i+1)*dx, y + (i+1)*dy)
+            move_to(seg_x, seg_y)
+            line_to(seg_x + dash_x, seg_y + dash_y)
+            seg_x += dx
+            seg_y += dy
             
         canvas.stroke()
     else:
@@ -1020,14 +1271,15 @@ def paths(canvas, paths, thickness, colour = "#333333"):
     #colour (string) - hex colour for paths. defualt is isaac dark grey
     
     canvas.begin_path()
+    move_to, line_to = canvas.move_to, canvas.line_to
     #for each path
     for path in paths:
         if len(path) > 2:
-            for i in range(len(path)-1):
-                canvas.move_to(path[i].x, path[i].y)
-                diff = path[i+1] - path[i]
-                new  = path[i] + diff*0.8
-                canvas.line_to(new.x, new.y)
+            for start, end in zip(path, path[1:]):
+                #dash over the first 80% of the way to the next point, worked out
+                #from the coordinates rather than with new vector3s
+                move_to(start.x, start.y)
+                line_to(start.x + 0.8*(end.x - start.x), start.y + 0.8*(end.y - start.y))
 
     canvas.line_width = thickness
     canvas.stroke_style = colour
@@ -1039,54 +1291,41 @@ def cart_arrows(self, canvas, vector, line_width, arrow_scale = 0.15,
         colours. Default colour is isaac middle grey. Draws an axes in bottom left."""
         #Modified by Michael Conterio, March 2016
         
-        #Draw axis reminder
+        #Draw axis reminder: dashed z, x and y axes from 50, 50. Each axis is drawn
+        #in a saved state and restored, rather than undoing its rotate and scale.
+        canvas.save()
         canvas.translate(50,50)
-        canvas.rotate(math.pi/6 + math.pi)
-        canvas.scale(10*line_width, 10*line_width)
-        canvas.begin_path()
-        #dashed axes
-        self.dashed_line(canvas, 0.2, 1,0)
-        canvas.line_width = 0.06
-        canvas.stroke()
-        canvas.scale(0.1/line_width, 0.1/line_width)
-        canvas.rotate(-math.pi/6- math.pi)
-        
-        canvas.scale(10*line_width, 10*line_width)
-        canvas.begin_path()
-        self.dashed_line(canvas, 0.2,1,0)
-        canvas.line_width = 0.06
-        canvas.stroke()
-        canvas.scale(0.1/line_width, 0.1/line_width)
-        
-        canvas.rotate(math.pi/2)
-        canvas.scale(10*line_width, 10*line_width)
-        canvas.begin_path()
-        canvas.stroke_style = "#000000"
-        self.dashed_line(canvas, 0.2,1,0)
-        canvas.line_width = 0.06
-        canvas.stroke()
-        canvas.scale(0.1/line_width, 0.1/line_width)
-        canvas.rotate(-math.pi/2)
-        
-        canvas.translate(-50,-50)
+        for angle in (math.pi/6 + math.pi, 0, math.pi/2):
+            canvas.save()
+            if angle:
+                canvas.rotate(angle)
+            canvas.scale(10*line_width, 10*line_width)
+            canvas.begin_path()
+            #dashed axes
+            self.dashed_line(canvas, 0.2, 1,0)
+            canvas.line_width = 0.06
+            canvas.stroke()
+            canvas.restore()
+        canvas.restore()
         
         #z component
-        canvas.translate(x, y)
+        if x or y:
+            canvas.translate(x, y)
         canvas.rotate(math.pi/6 + math.pi)
         #component arrow
-        z_vector = physics.vector3(1,0,0,vector.vector_type)
-        self.arrow(canvas, vector.z*vector3(1,0,0,vector.vector_type),0,0)
+        self.arrow(canvas, physics.vector3(vector.z,0,0,vector.vector_type),0,0)
         canvas.rotate(-math.pi/6- math.pi)
     
         #x component
-        self.arrow(canvas, vector.x*vector3(1,0,0,vector.vector_type),0,0)
+        self.arrow(canvas, physics.vector3(vector.x,0,0,vector.vector_type),0,0)
     
         #y component
         canvas.rotate(math.pi/2)
-        self.arrow(canvas, vector.y*vector3(1,0,0,vector.vector_type),0,0)
+        self.arrow(canvas, physics.vector3(vector.y,0,0,vector.vector_type),0,0)
         canvas.rotate(-math.pi/2)
     
-        canvas.translate(-x,-y)
+        if x or y:
+            canvas.translate(-x,-y)
         
 
 def component_arrows(self, canvas, vector, axis_vector = physics.vector3(0,1), 
@@ -1116,7 +1355,8 @@ def component_arrows(self, canvas, vector, axis_vector = physics.vector3(0,1),
     #canvas.translate(x, y)
     
     #component_parallel to axis_vector:
-    parallel_vector = (vector.dot(axis_vector)/(axis_vector.mag()**2)) * axis_vector
+    #(squared length of axis_vector is its dot with itself, no sqrt needed)
+    parallel_vector = (float(vector.dot(axis_vector))/axis_vector.dot(axis_vector)) * axis_vector
     parallel_vector.vector_type = vector.vector_type
     
     perpendicular_vector = vector - parallel_vector
@@ -1138,16 +1378,28 @@ def component_arrows(self, canvas, vector, axis_vector = physics.vector3(0,1),
         perpendicular_vector_start_y = 0
     
     
+    #components shorter than half a pixel wouldn't show, so aren't drawn
+    draw_parallel = parallel_vector.x**2 + parallel_vector.y**2 > 0.25
+    draw_perpendicular = perpendicular_vector.x**2 + perpendicular_vector.y**2 > 0.25
+    
     if what_to_draw == "arrow":              
-      new_arrow(canvas, parallel_vector, parallel_vector_start_x+x, parallel_vector_start_y+y)
-      new_arrow(canvas, perpendicular_vector, perpendicular_vector_start_x+x, perpendicular_vector_start_y+y)
+      if draw_parallel:
+        new_arrow(canvas, parallel_vector, parallel_vector_start_x+x, parallel_vector_start_y+y)
+      if draw_perpendicular:
+        new_arrow(canvas, perpendicular_vector, perpendicular_vector_start_x+x, perpendicular_vector_start_y+y)
     elif what_to_draw == "dashed":      
-      dashed_line(canvas, 10, parallel_vector.x + parallel_vector_start_x +x, parallel_vector.y + parallel_vector_start_y+y, x=parallel_vector_start_x+x, y= parallel_vector_start_y+y, colour = colour_parallel)
-      dashed_line(canvas, 10, perpendicular_vector.x + perpendicular_vector_start_x+x, perpendicular_vector.y + perpendicular_vector_start_y+y, x=perpendicular_vector_start_x+x, y= perpendicular_vector_start_y+y, colour = colour_perpendicular)
+      if draw_parallel:
+        dashed_line(canvas, 10, parallel_vector.x + parallel_vector_start_x +x, parallel_vector.y + parallel_vector_start_y+y, x=parallel_vector_start_x+x, y= parallel_vector_start_y+y, colour = colour_parallel)
+      if draw_perpendicular:
+        dashed_line(canvas, 10, perpendicular_vector.x + perpendicular_vector_start_x+x, perpendicular_vector.y + perpendicular_vector_start_y+y, x=perpendicular_vector_start_x+x, y= perpendicular_vector_start_y+y, colour = colour_perpendicular)
     
     return [parallel_vector, perpendicular_vector]
     
     
+# Colours already worked out by wavelength_to_rgb, by (wavelength, gamma). Spectra
+# are drawn from the same few hundred whole wavelengths over and over.
+_wavelength_rgbs = {}
+
 def wavelength_to_rgb(wavelength, gamma=0.8):
     '''This converts a given wavelength of light to an
     approximate RGB color value. The wavelength must be given
@@ -1160,6 +1412,11 @@ def wavelength_to_rgb(wavelength, gamma=0.8):
     #gamma (float) - Correction for eye sensitivity
     
     wavelength = float(wavelength)
+    key = (wavelength, gamma)
+    rgb = _wavelength_rgbs.get(key)
+    if rgb is not None:
+        return rgb
+
     if wavelength >= 380 and wavelength <= 440:
         #attenuate as at edge of vision
         attenuation = 0.3 + 0.7 * (wavelength - 380) / (440 - 380)
@@ -1195,4 +1452,22 @@ def wavelength_to_rgb(wavelength, gamma=0.8):
     R *= 255
     G *= 255
     B *= 255
-    return (int(R), int(G), int(B))
+    #room for every whole wavelength of the visible range
+    return _remember(_wavelength_rgbs, key, (int(R), int(G), int(B)), 1000)
+
+def wavelengths_to_rgb(wavelengths, gamma=0.8):
+    """Convert each of a sequence of wavelengths in nanometers to an approximate
+    RGB colour as wavelength_to_rgb does, e.g. for every wavelength of a spectrum.
+    """
+    #wavelengths (list of int) - wavelengths of light
+    #gamma (float) - Correction for eye sensitivity
+    
+    #colours already worked out are looked up directly, without a call each
+    get = _wavelength_rgbs.get
+    rgbs = []
+    for wavelength in wavelengths:
+        rgb = get((float(wavelength), gamma))
+        if rgb is None:
+            rgb = wavelength_to_rgb(wavelength, gamma)
+        rgbs.append(rgb)
+    return rgbs
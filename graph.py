@@ -67,7 +67,7 @@ class graph:
       __init__ - Initialises the graph, calls most getters and setters with default values. Does Not Draw The Graph.
       draw - draws the graph in its current state
       clear - called by draw, clears the canvas visually and of any transformations, sets bottom left origin, +ve upward coordinates
-      set_data - takes two lists of x values and y values, must be the same length
+      set_data - takes two lists of x values and y values, must be the same length, optionally flagged as presorted
       set_data_from_vectors - takes a list of vector3 objects to set the data points
       get_data - returns the current dataset of the graph as a list of vector3 objects
       set_x_range, get_x_range - getter and setter, if set is called empty, it sets the default value
@@ -102,11 +102,18 @@ class graph:
       self.line_wt = {}
       self.data = {}
       self.plot_type = {}
+      # The (x min, x max, y min, y max) of each non-empty dataset, kept up to date by set_data and remove_data
+      # so that the default axis ranges don't have to scan every point of every dataset
+      self._bounds = {}
       # Set attributes to given parameters
       # The scale factors are the number of pixels per unit x or y given
       # These will be set to the needed values when setting the axis ranges
       self.scale_x = 1
       self.scale_y = 1
+      # What the origin and scaling factors were last worked out from, see set_origin
+      self._origin_key = None
+      # True while a setter that will call set_origin itself is running the division setters, see _without_origin
+      self._suspend_origin = False
       # Initialising, these values will always be overwritten
       self.x_range = (-1, 1)
       self.y_range = (-1, 1)
@@ -142,26 +149,23 @@ class graph:
       self.set_x_marks()
       self.set_y_marks()
    
-   def set_data(self, xvals, yvals, name = "graph_1"):
+   def set_data(self, xvals, yvals, name = "graph_1", presorted = False):
       '''Sets the internal data set of the graph from two lists of x values and y values.
          Will raise errors if the two are not both lists of the same length.
+         If the caller guarantees the x values are in ascending order, presorted = True skips the ordering check.
          '''
       # Check for input errors
       try:
-         if len(xvals) is not len(yvals):
+         if len(xvals) != len(yvals):
             raise ValueError("The x and y datasets must be the same length")
       except TypeError:
          raise TypeError("The x and y datasets must be lists. If you only want one point, use [point]")
-      # Change the given two lists into a single vector3 list
-      data = list(range(0, len(xvals))) # Make data a list of equivalent length
-      for i in list(range(0, len(xvals))):
-         data[i] = vector3(xvals[i], yvals[i])
-      if name not in self.data: # If this is a new dataset
-         self.datasets += 1
-         self.set_line_colour("new", name) # Set the plot parameters
-         self.set_plot_type("line", name)
-         self.set_line_weight(1, name)
-      self.data[name] = sorted(data, key=lambda a: a.x)
+      # Change the given two lists into a single vector3 list, pairing the values up directly
+      data = [vector3(x, y) for x, y in zip(xvals, yvals)]
+      # Data streamed in order is common, so only sort when a pair is actually out of order
+      if not presorted and not all(a.x <= b.x for a, b in zip(data, data[1:])):
+         data.sort(key=lambda a: a.x) # Sort in place, no need for a sorted copy
+      self._store_data(data, name)
 
    def set_data_from_vectors(self, vectset, name = "graph_1"):
       '''Sets the internal data set of the graph from a list of vector3 objects.
@@ -172,15 +176,25 @@ class graph:
          for i in range(length):
             if type(vectset[i]) is not vector3: # Check that all components are vector3 objects
                raise TypeError("All elements of the data input to set_data_from_vectors must be vector3 objects")
-         self.data = vectset
       except TypeError:
             raise TypeError("The dataset must be a list. If you only want one point, use [point]")
+      self._store_data(sorted(vectset, key=lambda a: a.x), name)
+
+   def _store_data(self, data, name):
+      '''Records a dataset, already sorted by x, under "name" along with its extremal values.
+         A new dataset is also given the default plot parameters.
+         '''
       if name not in self.data: # If this is a new dataset
          self.datasets += 1
          self.set_line_colour("new", name) # Set the plot parameters
-         self.set_line_weight(1, name)
          self.set_plot_type("line", name)
-      self.data[name] = sorted(self.data, key=lambda a: a.x)
+         self.set_line_weight(1, name)
+      self.data[name] = data
+      if data:
+         # Sorted by x, so the x extremes are the ends, only the y values need a pass
+         self._bounds[name] = (data[0].x, data[-1].x, min(a.y for a in data), max(a.y for a in data))
+      else:
+         self._bounds.pop(name, None) # An empty dataset doesn't affect the axis ranges
 
    def get_data(self, name):
       '''Getter for the internal datasets of the graph.
@@ -196,6 +210,7 @@ class graph:
          return # If not, do nothing, as it's already 'removed' if it isn't there
       # Remove all dictionary entries
       del self.data[name]
+      self._bounds.pop(name, None)
       del self.line_colour[name]
       del self.line_wt[name]
       del self.plot_type[name]
@@ -207,13 +222,13 @@ class graph:
          If called empty with no data in the graph, it will set the axis to run from -10 to 10.
          Will always set to the form (Min, Max)
          '''
-      if x_range == "default" and [a for a in [self.data[name] for name in self.data] if a != []] == []:
+      if x_range == "default" and not self._bounds:
          x_range = (-10, 10) # Catch the case where no data was specified in any dataset
       elif x_range == "default": # If no input, take the values from the data
-         # Finds the extremal values of each dataset, and then the extremals of the extremals
-         self.x_range = (min([min(c) for c in[[a.x for a in b] for b in [self.data[name] for name in self.data]]]),
-                         max([max(c) for c in[[a.x for a in b] for b in [self.data[name] for name in self.data]]]))
-      elif type(x_range) is not tuple or len(x_range) is not 2: # Check the form of the input
+         # Finds the extremal values from those recorded for each dataset
+         self.x_range = (min(b[0] for b in self._bounds.values()),
+                         max(b[1] for b in self._bounds.values()))
+      elif type(x_range) is not tuple or len(x_range) != 2: # Check the form of the input
          raise ValueError("x_range and y_range must both be two value tuples")
       else:
          self.x_range = x_range
@@ -225,9 +240,9 @@ class graph:
       # Now set the divisions. Calling this also modifies the range values for justification
       # Checks to see which type of division determination is in use
       if self.x_set[0] == "width":
-         self.set_x_division_width(self.x_set[1])
+         self._without_origin(self.set_x_division_width, self.x_set[1])
       elif self.x_set[0] == "number":
-         self.set_x_division_no(self.x_set[1])
+         self._without_origin(self.set_x_division_no, self.x_set[1])
       self.set_origin() # Redetermine the origin and scaling factors
       
    def get_x_range(self):
@@ -242,13 +257,13 @@ class graph:
          If called empty with no data in the graph, it will set the axis to run from -10 to 10.
          Will always set to the form (Min, Max)
          '''
-      if y_range == "default" and [a for a in [self.data[name] for name in self.data] if a != []] == []:
+      if y_range == "default" and not self._bounds:
          y_range = (-10, 10) # Catch the case where no data was specified
       elif y_range == "default": # If no input, take the values from the data
-         # Finds the extremal values of each dataset, and then the extremals of the extremals
-         self.y_range = (min([min(c) for c in[[a.y for a in b] for b in [self.data[name] for name in self.data]]]),
-                         max([max(c) for c in[[a.y for a in b] for b in [self.data[name] for name in self.data]]]))
-      elif type(y_range) is not tuple or len(y_range) is not 2: # Check that the input is of the correct form
+         # Finds the extremal values from those recorded for each dataset
+         self.y_range = (min(b[2] for b in self._bounds.values()),
+                         max(b[3] for b in self._bounds.values()))
+      elif type(y_range) is not tuple or len(y_range) != 2: # Check that the input is of the correct form
          raise ValueError("x_range and y_range must both be two value tuples")
       else:
          self.y_range = y_range
@@ -260,9 +275,9 @@ class graph:
       # Now set the divisions. Calling this also modifies the range values for justification
       # Checks to see which type of division determination is in use
       if self.y_set[0] == "width":
-         self.set_y_division_width(self.y_set[1])
+         self._without_origin(self.set_y_division_width, self.y_set[1])
       elif self.y_set[0] == "number":
-         self.set_y_division_no(self.y_set[1])
+         self._without_origin(self.set_y_division_no, self.y_set[1])
       self.set_origin() # Redetermine the origin and scaling factors
 
    def get_y_range(self):
@@ -290,12 +305,12 @@ class graph:
       # Set the upper and lower limits to the next multiple of <width> along from their current value
       # Modulo has the sign of the divisor and is rounded toward -ve infinity
       limits = (limits[0] - limits[0]%width, limits[1] + (-1 * limits[1])%width)
-      self.x_divis = [] # Generate and/or clear the list of divisions
-      for i in list(range(1 + int_round((limits[1] - limits[0])/width))): # Need one more value than the division number
-         # Since both limits are multiples of width, add a number of widths to get each division edge
-         self.x_divis += [limits[0] + width * i]
+      # Since both limits are multiples of width, add a number of widths to get each division edge
+      # Need one more value than the division number
+      self.x_divis = [limits[0] + width * i for i in range(1 + int_round((limits[1] - limits[0])/width))]
       self.x_range = limits # Now set the object variable to the new limits to ensure correct scaling is achieved
-      self.set_origin() # Redetermine the origin and scaling factors
+      if not self._suspend_origin:
+         self.set_origin() # Redetermine the origin and scaling factors
          
       
    def set_x_division_no(self, num = 10):
@@ -311,38 +326,33 @@ class graph:
       # If-else block ensures the origin is included in the plot
       if self.x_range[0] >= 0:
          limits = (0, self.x_range[1]) # Start from 0
-         step = (limits[1] - limits[0]) / num # range length is now the upper limit, which is +ve
-         self.x_divis = [] # Generate and/or clear the list of divisions
-         for i in list(range(num + 1)): # Generate list by stepping from 0 to upper limit
-            self.x_divis += [limits[0] + i * step] # in steps of upper limit / number of steps
       elif self.x_range[1] <= 0:
          limits = (self.x_range[0], 0) # End at 0
-         step = (limits[1] - limits[0]) / num # range length is now |lower limit|, lower limit is -ve
-         self.x_divis = [] # Generate and/or clear the list of divisions
-         for i in list(range(num + 1)): # Generate list by stepping from lower limit to 0
-            self.x_divis += [limits[0] + i * step] # in steps of |lower limit| / number of steps
       else:
          limits = self.x_range # Includes 0 already
-         step = (limits[1] - limits[0]) / num # Find initial step length to give correct number of divisions
-         self.x_divis = [] # Generate and/or clear the list of divisions
-         for i in list(range(num + 1)): # Generate initial list by stepping from lower to upper limit
-            self.x_divis += [limits[0] + i * step] # in steps of total range / number of steps
-         # Sort according to distance from 0
-         order = sorted(self.x_divis, key=lambda a: abs(a))
+      # Step from the lower to the upper limit in one pass, the same ramp serves all three cases
+      step = (limits[1] - limits[0]) / num # Find initial step length to give correct number of divisions
+      self.x_divis = [limits[0] + i * step for i in range(num + 1)]
+      if limits[0] < 0 < limits[1]: # Only a range that straddles 0 needs justifying
+         # The ramp is increasing, so the value closest to 0 is one of the two either side of it
+         below = min(int(-limits[0] / step), num - 1) # Index of the last division at or below 0
+         nearest = min((below, below + 1), key=lambda i: abs(self.x_divis[i]))
+         closest = self.x_divis[nearest]
          # Principle of the following is that it widens the divisions to push the closest value to 0 to 0.
          # The side that didn't include the closest value will thus extend now past the original extent
-         if order[0] < 0: # If the closest value to 0 is -ve
+         if closest < 0: # If the closest value to 0 is -ve
             self.x_range = limits # Tell the width function what the current extents are
             # The new width will be (the length from min to 0) / (the number of divisions between min and the one being pushed to 0)
-            self.set_x_division_width(abs(limits[0])/self.x_divis.index(order[0]))
+            self._without_origin(self.set_x_division_width, abs(limits[0])/nearest)
             self.x_set = ("number", num) # Width() records this as width, so change it back
-         if order[0] > 0: # If the closest value to 0 is +ve
+         if closest > 0: # If the closest value to 0 is +ve
             self.x_range = limits # Tell the width function what the current extents are
             # The new width will be (the length from 0 to max) / (the number of divisions between the one being pushed to 0 and max)
-            self.set_x_division_width(limits[1]/(len(self.x_divis) - self.x_divis.index(order[0])))
+            self._without_origin(self.set_x_division_width, limits[1]/(num + 1 - nearest))
             self.x_set = ("number", num) # Width() records this as width, so change it back
          self.x_range = limits # Now set the object variable to the new limits to ensure correct scaling is achieved
-         self.set_origin() # Redetermine the origin and scaling factors
+         if not self._suspend_origin:
+            self.set_origin() # Redetermine the origin and scaling factors
          
    def set_y_division_width(self, width = 1.0):
       '''This Method takes a width argument and uses it to set the values in the list of y axis divisions.
@@ -363,12 +373,12 @@ class graph:
       # Set the upper and lower limits to the next multiple of <width> along from their current value
       # Modulo has the sign of the divisor and is rounded toward -ve infinity
       limits = (limits[0] - limits[0]%width, limits[1] + (-1 * limits[1])%width)
-      self.y_divis = [] # Generate and/or clear the list of divisions
-      for i in list(range(1 + int_round((limits[1] - limits[0])/width))): # Need one more value than the division number
-         # Since both limits are multiples of width, add a number of widths to get each division edge
-         self.y_divis += [limits[0] + width * i]
+      # Since both limits are multiples of width, add a number of widths to get each division edge
+      # Need one more value than the division number
+      self.y_divis = [limits[0] + width * i for i in range(1 + int_round((limits[1] - limits[0])/width))]
       self.y_range = limits # Now set the object variable to the new limits to ensure correct scaling is achieved
-      self.set_origin() # Redetermine the origin and scaling factors
+      if not self._suspend_origin:
+         self.set_origin() # Redetermine the origin and scaling factors
       
    def set_y_division_no(self, num = 10):
       '''This Method takes an argument of the desired number of divisions along the axis, and sets the values
@@ -383,45 +393,33 @@ class graph:
       # If-else block ensures the origin is included in the plot
       if self.y_range[0] >= 0:
          limits = (0, self.y_range[1]) # Start from 0
-         step = (limits[1] - limits[0]) / num # range length is now the upper limit, which is +ve
-         self.y_divis = [] # Generate and/or clear the list of divisions
-         for i in list(range(num + 1)): # Generate list by stepping from 0 to upper limit
-            self.y_divis += [limits[0] + i * step] # in steps of upper limit / number of steps
       elif self.y_range[1] <= 0:
          limits = (self.y_range[0], 0) # End at 0
-         step = (limits[1] - limits[0]) / num # range length is now |lower limit|, lower limit is -ve
-         self.y_divis = [] # Generate and/or clear the list of divisions
-         for i in list(range(num + 1)): # Generate list by stepping from lower limit to 0
-            self.y_divis += [limits[0] + i * step] # in steps of |lower limit| / number of steps
       else:
          limits = self.y_range # Includes 0 already
-         step = (limits[1] - limits[0]) / num # Find initial step length to give correct number of divisions
-         self.y_divis = [] # Generate and/or clear the list of divisions
-         for i in list(range(num + 1)): # Generate initial list by stepping from lower to upper limit
-            self.y_divis += [limits[0] + i * step] # in steps of total range / number of steps
-         # Sort according to distance from 0
-         order = sorted(self.y_divis, key=lambda a: abs(a))
+      # Step from the lower to the upper limit in one pass, the same ramp serves all three cases
+      step = (limits[1] - limits[0]) / num # Find initial step length to give correct number of divisions
+      self.y_divis = [limits[0] + i * step for i in range(num + 1)]
+      if limits[0] < 0 < limits[1]: # Only a range that straddles 0 needs justifying
+         # The ramp is increasing, so the value closest to 0 is one of the two either side of it
+         below = min(int(-limits[0] / step), num - 1) # Index of the last division at or below 0
+         nearest = min((below, below + 1), key=lambda i: abs(self.y_divis[i]))
+         closest = self.y_divis[nearest]
          # Principle of the following is that it widens the divisions to push the closest value to 0 to 0.
          # The side that didn't include the closest value will thus extend now past the original extent
-         if order[0] < 0: # If the closest value to 0 is -ve
+         if closest < 0: # If the closest value to 0 is -ve
             self.y_range = limits # Tell the width function what the current extents are
             # The new width will be (the length from min to 0) / (the number of divisions between min and the one being pushed to 0)
-            self.set_y_division_width(abs(limits[0])/self.y_divis.index(order[0]))
+            self._without_origin(self.set_y_division_width, abs(limits[0])/nearest)
             self.y_set = ("number", num) # Width() records this as width, so change it back
-         if order[0] > 0: # If the closest value to 0 is +ve
+         if closest > 0: # If the closest value to 0 is +ve
             self.y_range = limits # Tell the width function what the current extents are
             # The new width will be (the length from 0 to max) / (the number of divisions between the one being pushed to 0 and max)
-            self.set_y_division_width(limits[1]/(len(self.y_divis) - self.y_divis.index(order[0])))
+            self._without_origin(self.set_y_division_width, limits[1]/(num + 1 - nearest))
             self.y_set = ("number", num) # Width() records this as width, so change it back
          self.y_range = limits # Now set the object variable to the new limits to ensure correct scaling is achieved
-         # Now set the scaling factor, as defined above, the 0.0s are to avoid integer division
-         if self.y_range[0] >= 0: # If the axis is 0 -> y max
-            self.scale_y = (self.ch - (2 * self.gap) + 0.0) / self.y_range[1]
-         elif self.y_range[1] <= 0: # If the axis is y min -> 0
-            self.scale_y = (self.ch - (2 * self.gap) + 0.0) / abs(self.y_range[0])
-         else: # If the axis is y min -> y max
-            self.scale_y = (self.ch - (2 * self.gap) + 0.0) / (self.y_range[1] - self.y_range[0])
-         self.set_origin() # Redermine the origin and scaling factors
+         if not self._suspend_origin:
+            self.set_origin() # Redetermine the origin and scaling factors
    
    def get_x_divisions(self):
       '''Getter for the divisions of the x axis.
@@ -441,7 +439,7 @@ class graph:
          Line draws lines between consecutive points. 
          Points draws a circle with diameter equal to the line width at each data point.
          '''
-      if typestr is not "line" and typestr is not "points": # Checks that the input is correct and raises an error if not
+      if typestr != "line" and typestr != "points": # Checks that the input is correct and raises an error if not
          raise ValueError("plot type must be a string, and be either 'line' or 'points'")
       else:
          self.plot_type[name] = typestr
@@ -470,12 +468,11 @@ class graph:
          '''
       if colstr == "new":
          # Determines the default for a new line randomly, but will be the same every graph (constant seed)
-         cols = [0,1,2]
-         for i in cols:
-            cols[i] = (random.randint(0,255) + 200)/2
-         colstr = "#{0:x}{1:x}{2:x}".format(cols[0], cols[1], cols[2])
+         # Integer division keeps each channel an int between 100 and 227, always two hex digits
+         cols = [(random.randint(0,255) + 200)//2 for i in range(3)]
+         colstr = "#%02x%02x%02x" % (cols[0], cols[1], cols[2])
       # Check that the colour string is of the correct form
-      if type(colstr) is not str or ( len(colstr) is not 7 and len(colstr) is not 4 ) :
+      if type(colstr) is not str or ( len(colstr) != 7 and len(colstr) != 4 ) :
          raise ValueError("Argument must be a string of form '#rrggbb' in hexadecimals")
       
       self.line_colour[name] = colstr
@@ -503,7 +500,7 @@ class graph:
          Argument must be a string of form "#rrggbb" in hexadecimals
          '''
       # Check that the colour string is of the correct form
-      if type(colstr) is not str or ( len(colstr) is not 7 and len(colstr) is not 4 ) :
+      if type(colstr) is not str or ( len(colstr) != 7 and len(colstr) != 4 ) :
          raise ValueError("Argument must be a string of form '#rrggbb' in hexadecimals")
       self.axis_colour = colstr
    
@@ -571,22 +568,19 @@ class graph:
          point of the axes, (0, 0) is on the canvas.
          The scaling factors are floats giving the number of pixels per unit on the x, y axes.
          '''
-      if type(origin) is not vector3 and origin is not "default": # Need a vector
+      if type(origin) is not vector3 and origin != "default": # Need a vector
          raise TypeError("the origin must be set to a vector coordinate")
       elif origin == "default": # Check whether we are in default origin mode
-         # Now set the scaling factors, as defined above, the 0.0s are to avoid integer division
-         if self.x_range[0] >= 0: # If the axis is 0 -> x max
-            self.scale_x = (self.cw - 2 * self.gap + 0.0) / self.x_range[1]
-         elif self.x_range[1] <= 0: # If the axis is x min -> 0
-            self.scale_x = (self.cw - 2 * self.gap + 0.0) / abs(self.x_range[0])
-         else: # If the axis is x min -> x max
-            self.scale_x = (self.cw - 2 * self.gap + 0.0) / (self.x_range[1] - self.x_range[0])
-         if self.y_range[0] >= 0: # If the axis is 0 -> y max
-            self.scale_y = (self.ch - (2 * self.gap) + 0.0) / self.y_range[1]
-         elif self.y_range[1] <= 0: # If the axis is y min -> 0
-            self.scale_y = (self.ch - (2 * self.gap) + 0.0) / abs(self.y_range[0])
-         else: # If the axis is y min -> y max
-            self.scale_y = (self.ch - (2 * self.gap) + 0.0) / (self.y_range[1] - self.y_range[0])
+         # The default origin and scaling factors only depend on these, so if none of them have changed
+         # since they were last worked out there is nothing to do. Setters call this in a cascade and
+         # draw() calls it every time, so most calls end here.
+         key = (self.x_range, self.y_range, self.cw, self.ch, self.gap)
+         if key == self._origin_key:
+            return
+         self._origin_key = key
+         # Now set the scaling factors
+         self.scale_x = self._scale(self.x_range, self.cw)
+         self.scale_y = self._scale(self.y_range, self.ch)
          # Note the self.gaps here are the gap between the axis ends and the canvas edge
          if self.x_range[0] >= 0 and self.y_range[0] >= 0:
             self.origin = vector3(self.gap, self.gap) # Bottom left corner if only top right quadrant needed
@@ -608,6 +602,30 @@ class graph:
             self.origin = vector3(-1 * self.x_range[0] * self.scale_x + self.gap, -1 * self.y_range[0] * self.scale_y + self.gap)
       else:
          self.origin = origin # If they have specified an origin
+         self._origin_key = None # The next default call must work the origin out again
+
+   def _without_origin(self, setter, arg):
+      '''Calls a division setter with arg, without it redetermining the origin.
+         For use by methods that call set_origin themselves once the divisions are settled.
+         '''
+      suspended = self._suspend_origin # Could already be suspended by an outer setter
+      self._suspend_origin = True
+      try:
+         setter(arg)
+      finally:
+         self._suspend_origin = suspended
+
+   def _scale(self, rng, pixels):
+      '''Returns the number of pixels per unit for an axis with value range rng drawn across a canvas
+         dimension of pixels, less the gap at each end.
+         '''
+      if rng[0] >= 0: # If the axis is 0 -> max
+         span = rng[1]
+      elif rng[1] <= 0: # If the axis is min -> 0
+         span = abs(rng[0])
+      else: # If the axis is min -> max
+         span = rng[1] - rng[0]
+      return (pixels - 2 * self.gap + 0.0) / span # The 0.0 is to avoid integer division
 
    def get_origin(self):
       '''Getter for origin.